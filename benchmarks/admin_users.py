@@ -0,0 +1,59 @@
+"""Benchmark de los filtros de /admin/users (FTS5, año y puesto del premio).
+
+Uso:
+    python benchmarks/admin_users.py [--users 100000] [--awards-per-user 10]
+
+Mide la consulta de la página (50 filas con cursor) y la latencia de la ruta
+completa para cada combinación de filtros.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FILTERS = [
+    {},
+    {'name': 'Asociado 0042'},
+    {'award_year': '2024'},
+    {'award_year': '2015'},
+    {'award_position': 'Gran Premio'},
+    {'award_year': '2023', 'award_position': '1er lugar'},
+    {'name': 'asociado', 'award_year': '2022', 'after': '50000'},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--awards-per-user', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from datagen import scratch_database, populate, bench_app
+    path, uri = scratch_database('admin_users')
+    populate(uri, args.users, birds_per_user=1, awards_per_user=args.awards_per_user)
+
+    app = bench_app(uri)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    print(f'{args.users} usuarios, {args.users * args.awards_per_user} premios')
+    for params in FILTERS:
+        client.get('/admin/users', query_string=params)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get('/admin/users', query_string=params)
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+        print(f'{str(params):<60} mediana {statistics.median(timings) * 1000:7.2f} ms')
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
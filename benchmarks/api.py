@@ -0,0 +1,86 @@
+"""Benchmark de la API JSON (/api/v1) frente a las páginas HTML equivalentes.
+
+Uso:
+    python benchmarks/api.py [--size 5000] [--repeat 10]
+
+Para cada par página/endpoint se mide el tamaño de la respuesta (sin comprimir y
+con gzip), la latencia mediana y el número de consultas SQL. La app solo
+comprime la API; las páginas HTML dependen del proxy frontal. El reporte de
+premios se sirve desde la caché por versión tras la primera petición.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from specialist_users import QueryCounter
+
+
+def cases(user_id):
+    return [
+        ('listado de asociados', '/specialist/users?per_page=50',
+         '/api/v1/users?limit=50&include=birds'),
+        ('listado (solo nombres)', '/specialist/users?per_page=50',
+         '/api/v1/users?limit=50&fields=id,full_name'),
+        ('ficha de asociado', f'/specialist/user/{user_id}',
+         f'/api/v1/users/{user_id}?include=birds,awards'),
+        ('premios', '/reports/awards', '/api/v1/awards?limit=200'),
+    ]
+
+
+def measure(client, counter, url, repeat, gzip_encoding):
+    headers = {'Accept-Encoding': 'gzip'} if gzip_encoding else {}
+    timings, queries, size = [], [], 0
+    for _ in range(repeat):
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        timings.append(time.perf_counter() - start)
+        queries.append(counter.count)
+        assert response.status_code == 200, (url, response.status_code)
+        size = len(response.data)
+    return statistics.median(timings), max(queries), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    from datagen import scratch_database, populate, bench_app
+    path, uri = scratch_database('api')
+    populate(uri, args.size, awards_per_user=2)
+    app = bench_app(uri)
+
+    from models import db, User
+    with app.app_context():
+        specialist = User(username='bench_specialist', email='specialist@bench.com',
+                          full_name='Especialista', phone='12345678', role='specialist')
+        specialist.set_password('bench123')
+        db.session.add(specialist)
+        db.session.commit()
+        user_id = db.session.execute(db.select(User.id).where(User.username.like('bench%'))).scalar()
+        counter = QueryCounter(db.engine)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench_specialist', 'password': 'bench123'})
+
+    print(f'{args.size} asociados, mediana de {args.repeat} peticiones')
+    for label, page, endpoint in cases(user_id):
+        print(label)
+        for kind, url in (('HTML', page), ('JSON', endpoint)):
+            latency, queries, raw = measure(client, counter, url, args.repeat, False)
+            _, _, compressed = measure(client, counter, url, 1, True)
+            print(f'  {kind}: {raw / 1024:9.1f} KiB ({compressed / 1024:8.1f} KiB gzip) | '
+                  f'{latency * 1000:7.1f} ms | {queries:3d} consultas')
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
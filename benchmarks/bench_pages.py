@@ -0,0 +1,91 @@
+"""Suite pytest-benchmark de las páginas críticas por tamaño de club.
+
+Uso:
+    python -m pytest benchmarks/bench_pages.py [--club-sizes 1000,10000] [--rounds 5]
+                     [--birds-per-user 3] [--awards-per-user 2] [--categories 40]
+                     [-k associates_report] [--benchmark-json resultado.json]
+
+Cada tamaño usa una base sintética (ver datagen.py y conftest.py) y cada caso
+hace peticiones con el cliente de pruebas de Flask. pytest-benchmark informa
+las latencias. El máximo de consultas SQL por petición y el pico de memoria
+(tracemalloc, en una petición adicional sin cronometrar para no falsear las
+latencias) van en extra_info y en un resumen al final. Los reportes se miden
+en frío: la caché de páginas se vacía antes de cada petición.
+
+Requiere pytest y pytest-benchmark. El archivo no sigue el patrón test_*.py
+para que `pytest` sin argumentos no lo ejecute; hay que indicarlo explícitamente.
+"""
+import random
+import tracemalloc
+
+import pytest
+
+from conftest import RESULTS
+
+# (nombre, sesión, método, url, vaciar caché de reportes)
+CASES = [
+    ('specialist_users', 'specialist', 'GET', '/specialist/users', False),
+    ('admin_users', 'admin', 'GET', '/admin/users', False),
+    ('admin_users_name', 'admin', 'GET', '/admin/users?name=Asociado 0001', False),
+    ('admin_users_year', 'admin', 'GET', '/admin/users?award_year={year}', False),
+    ('admin_users_position', 'admin', 'GET', '/admin/users?award_position=1er lugar', False),
+    ('associates_report', 'admin', 'GET', '/admin/associates_report', True),
+    ('contact_report', 'specialist', 'GET', '/reports/contact', True),
+    ('awards_report', 'specialist', 'GET', '/reports/awards', True),
+    ('forecast_report', 'specialist', 'GET', '/reports/forecast', False),
+    ('leaderboard', 'specialist', 'GET', '/reports/leaderboard?scope=year&key={year}&limit=25', False),
+    ('profile_post', 'user', 'POST', '/profile', False),
+    ('login', None, 'POST', '/login', False),
+]
+
+
+def profile_form(rng, category_ids):
+    form = {'full_name': 'Asociado de prueba', 'phone': '12345678', 'address': 'Calle 1'}
+    for category_id in rng.sample(category_ids, min(3, len(category_ids))):
+        quantity = rng.randint(1, 100)
+        form[f'category_{category_id}'] = quantity
+        form[f'export_{category_id}'] = rng.randint(0, quantity)
+    return form
+
+
+@pytest.mark.parametrize('name, session, method, url, cold', CASES, ids=[case[0] for case in CASES])
+def test_page(benchmark, request, club, name, session, method, url, cold):
+    import page_cache
+
+    client = club.clients[session]
+    url = url.format(year=club.year)
+    rng = random.Random(club.size)
+    queries = []
+
+    def prepare():
+        if cold:
+            page_cache.fragments.clear()
+        if name == 'profile_post':
+            data = profile_form(rng, club.category_ids)
+        elif name == 'login':
+            data = {'username': club.username, 'password': 'bench123'}
+        else:
+            data = None
+        club.counter.count = 0
+        return (data,), {}
+
+    def run(data):
+        response = client.open(url, method=method, data=data)
+        queries.append(club.counter.count)
+        assert response.status_code in (200, 302), (name, response.status_code)
+
+    # Una ronda de calentamiento (cachés recién vaciadas) fuera de la medición
+    benchmark.pedantic(run, setup=prepare, rounds=request.config.getoption('rounds'),
+                       iterations=1, warmup_rounds=1)
+    queries = queries[1:]
+
+    # Memoria en una pasada aparte sin cronometrar: tracemalloc enlentece
+    # cada asignación
+    args, _ = prepare()
+    tracemalloc.start()
+    client.open(url, method=method, data=args[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    benchmark.extra_info.update(club_size=club.size, queries=max(queries), peak_kib=round(peak / 1024))
+    RESULTS.append((f'{name}[{club.size}]', max(queries), peak))
@@ -0,0 +1,195 @@
+"""Prueba de carga de ediciones concurrentes sobre las mismas aves.
+
+Uso:
+    python benchmarks/concurrency.py [--associates 5] [--specialists 4] [--sessions 4]
+                                     [--edits 25] [--birds-per-user 3]
+
+Sobre una base sintética (ver datagen.py), varios hilos editan a la vez las
+aves de unos pocos asociados: especialistas cambiando la comida en
+/specialist/user/<id> y sesiones del propio asociado cambiando cantidades en
+/profile. Cada hilo carga el formulario, toca una fila y lo envía con las
+versiones que leyó, como un navegador. Al final se comprueba que no se perdió
+ninguna actualización: ninguna fila aceptó dos escrituras basadas en la misma
+versión, cada versión final es la inicial más las escrituras aceptadas y los
+totales precalculados coinciden con los recalculados desde UserBirds.
+"""
+import argparse
+import itertools
+import math
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Cada edición escribe un valor único: si dos coincidieran, la segunda no
+# cambiaría nada, se aceptaría sin escribir y parecería una pérdida
+SERIAL = itertools.count(1)
+VERSION_RE = re.compile(r'name="version_(\d+)" value="(\d+)"')
+FIELD_RE = r'name="{}"\s+value="([^"]*)"'
+
+
+def login(app, username, password):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302, (username, response.status_code)
+    return client
+
+
+def field(html, name):
+    return re.search(FIELD_RE.format(re.escape(name)), html).group(1)
+
+
+def specialist_edit(client, rng, user_id, birds):
+    # Cambia la comida por ave de una fila: version_<bird.id>
+    html = client.get(f'/specialist/user/{user_id}').get_data(as_text=True)
+    versions = {int(bird_id): int(version) for bird_id, version in VERSION_RE.findall(html)}
+    bird_id = rng.choice(sorted(versions))
+    food = f'{0.05 + next(SERIAL) / 10000:.4f}'
+    data = {f'version_{bird_id}': versions[bird_id], f'food_{bird_id}': food}
+    response = client.post(f'/specialist/user/{user_id}', data=data)
+    return response.status_code, birds[bird_id], versions[bird_id]
+
+
+def associate_edit(client, rng, user_id, categories):
+    # Cambia la cantidad de una de sus aves: version_<category.id>
+    html = client.get('/profile').get_data(as_text=True)
+    data = {name: field(html, name) for name in ('full_name', 'phone', 'address', 'user_version')}
+    versions = {int(category_id): int(version) for category_id, version in VERSION_RE.findall(html)}
+    for category_id in versions:
+        data[f'version_{category_id}'] = versions[category_id]
+        data[f'category_{category_id}'] = field(html, f'category_{category_id}')
+        data[f'export_{category_id}'] = field(html, f'export_{category_id}')
+    category_id = rng.choice(categories)
+    # Por encima de las cantidades generadas (1-200): nunca menor que la exportación
+    data[f'category_{category_id}'] = 200 + next(SERIAL)
+    response = client.post('/profile', data=data)
+    return response.status_code, (user_id, category_id), versions[category_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--associates', type=int, default=5, help='asociados que se editan a la vez')
+    parser.add_argument('--specialists', type=int, default=4, help='hilos de especialistas')
+    parser.add_argument('--sessions', type=int, default=4, help='hilos de sesiones de asociados')
+    parser.add_argument('--edits', type=int, default=25, help='ediciones por hilo')
+    parser.add_argument('--birds-per-user', type=int, default=3)
+    args = parser.parse_args()
+
+    from datagen import scratch_database, populate, bench_app
+
+    path, uri = scratch_database('concurrency')
+    populate(uri, args.associates, birds_per_user=args.birds_per_user)
+    app = bench_app(uri)
+
+    from models import db, User, UserBirds, UserInventory, CategoryInventory
+    import inventory
+    with app.app_context():
+        associates = db.session.execute(
+            db.select(User.id, User.username).where(User.username.like('bench%'))
+        ).all()
+        db.session.execute(db.update(User).where(User.username.like('bench%')).values(address='Calle 1'))
+        for i in range(args.specialists):
+            specialist = User(username=f'bench_specialist{i}', email=f'specialist{i}@bench.com',
+                              full_name='Especialista', phone='12345678', role='specialist')
+            specialist.set_password('bench123')
+            db.session.add(specialist)
+        db.session.commit()
+        rows = db.session.execute(
+            db.select(UserBirds.id, UserBirds.user_id, UserBirds.category_id, UserBirds.version)
+        ).all()
+    birds = {row.id: (row.user_id, row.category_id) for row in rows}
+    initial = {(row.user_id, row.category_id): row.version for row in rows}
+    categories = defaultdict(list)
+    for user_id, category_id in birds.values():
+        categories[user_id].append(category_id)
+
+    results, lock = [], threading.Lock()
+    start_barrier = threading.Barrier(args.specialists + args.sessions)
+
+    def worker(seed, username, targets):
+        # Especialistas: cualquier asociado; sesiones de asociado: sus propias aves
+        rng = random.Random(seed)
+        client = login(app, username, 'bench123')
+        start_barrier.wait()
+        for _ in range(args.edits):
+            user_id = rng.choice(targets)
+            started = time.perf_counter()
+            if username.startswith('bench_specialist'):
+                outcome = specialist_edit(client, rng, user_id, birds)
+            else:
+                outcome = associate_edit(client, rng, user_id, categories[user_id])
+            with lock:
+                results.append((*outcome, time.perf_counter() - started))
+
+    user_ids = [user_id for user_id, _ in associates]
+    threads = [threading.Thread(target=worker, args=(i, f'bench_specialist{i}', user_ids))
+               for i in range(args.specialists)]
+    # Varias sesiones abiertas del mismo asociado
+    for i in range(args.sessions):
+        user_id, username = associates[i % len(associates)]
+        threads.append(threading.Thread(target=worker, args=(1000 + i, username, [user_id])))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _, _, _ in results)
+    accepted = [(row, version) for status, row, version, _ in results if status == 302]
+    timings = sorted(duration for *_, duration in results)
+    p95 = timings[math.ceil(len(timings) * 0.95) - 1]  # rango más cercano
+    print(f'{len(results)} ediciones en {elapsed:.1f} s: {statuses[302]} aceptadas, '
+          f'{statuses[409]} conflictos (409), otras {sum(statuses.values()) - statuses[302] - statuses[409]}')
+    print(f'  latencia GET+POST p50 {statistics.median(timings) * 1000:.1f} ms, '
+          f'p95 {p95 * 1000:.1f} ms')
+
+    errors = []
+    if statuses[302] + statuses[409] != len(results):
+        errors.append(f'respuestas inesperadas: {dict(statuses)}')
+    duplicated = [key for key, count in Counter(accepted).items() if count > 1]
+    if duplicated:
+        errors.append(f'{len(duplicated)} escrituras aceptadas sobre una versión ya reemplazada')
+    with app.app_context():
+        final = {(row.user_id, row.category_id): row.version for row in db.session.execute(
+            db.select(UserBirds.user_id, UserBirds.category_id, UserBirds.version))}
+        writes = Counter(row for row, _ in accepted)
+        drift = [row for row in initial if final.get(row) != initial[row] + writes[row]]
+        if drift:
+            errors.append(f'{len(drift)} filas con versión distinta a las escrituras aceptadas')
+        totals = [
+            sorted(db.session.execute(db.select(UserInventory.user_id, UserInventory.total_quantity,
+                                                UserInventory.total_export)).all()),
+            sorted(db.session.execute(db.select(CategoryInventory.category_id, CategoryInventory.total_quantity,
+                                                CategoryInventory.total_export)).all()),
+        ]
+        inventory.rebuild()
+        rebuilt = [
+            sorted(db.session.execute(db.select(UserInventory.user_id, UserInventory.total_quantity,
+                                                UserInventory.total_export)).all()),
+            sorted(db.session.execute(db.select(CategoryInventory.category_id, CategoryInventory.total_quantity,
+                                                CategoryInventory.total_export)).all()),
+        ]
+        db.session.rollback()
+        if totals != rebuilt:
+            errors.append('los totales precalculados no coinciden con UserBirds')
+    os.remove(path)
+
+    for error in errors:
+        print(f'  ERROR: {error}')
+    if errors:
+        sys.exit(1)
+    print('  sin actualizaciones perdidas')
+
+
+if __name__ == '__main__':
+    main()
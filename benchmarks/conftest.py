@@ -0,0 +1,102 @@
+"""Fixtures de la suite pytest-benchmark (bench_pages.py).
+
+Cada tamaño de club es una base sintética propia (ver datagen.py) con su
+aplicación; las cachés de módulo (páginas, referencia, principales) se vacían
+antes de cada caso para que un tamaño no reutilice datos de otro.
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Consultas SQL y memoria por caso, para el resumen final
+RESULTS = []
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('aves', 'Suite de benchmarks de Aves')
+    group.addoption('--club-sizes', default='1000,10000',
+                    help='asociados por base sintética, separados por comas')
+    group.addoption('--birds-per-user', type=int, default=3)
+    group.addoption('--awards-per-user', type=int, default=2)
+    group.addoption('--categories', type=int, default=40,
+                    help='subcategorías sintéticas además de las sembradas')
+    group.addoption('--rounds', type=int, default=5, help='peticiones cronometradas por caso')
+
+
+def pytest_generate_tests(metafunc):
+    if 'club' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('club_sizes').split(',') if size]
+        metafunc.parametrize('club', sizes, indirect=True, scope='session', ids=lambda size: f'{size}')
+
+
+def login(app, username, password):
+    client = app.test_client()
+    response = client.post('/login', data={'username': username, 'password': password})
+    assert response.status_code == 302, (username, response.status_code)
+    return client
+
+
+@pytest.fixture(scope='session')
+def club(request):
+    from datagen import scratch_database, populate, bench_app
+    from specialist_users import QueryCounter
+
+    options = request.config.option
+    size = request.param
+    path, uri = scratch_database(f'suite_{size}')
+    populate(uri, size, birds_per_user=options.birds_per_user,
+             awards_per_user=options.awards_per_user, categories=options.categories)
+    app = bench_app(uri)
+
+    from models import db, User, BirdCategory
+    with app.app_context():
+        specialist = User(username='bench_specialist', email='specialist@bench.com',
+                          full_name='Especialista', phone='12345678', role='specialist')
+        specialist.set_password('bench123')
+        db.session.add(specialist)
+        db.session.commit()
+        username = db.session.execute(db.select(User.username).where(User.username.like('bench1%'))).scalar()
+        category_ids = db.session.execute(db.select(BirdCategory.id)).scalars().all()
+        counter = QueryCounter(db.engine)
+
+    yield SimpleNamespace(
+        size=size,
+        app=app,
+        username=username,
+        category_ids=category_ids,
+        counter=counter,
+        year=time.localtime().tm_year - 1,
+        clients={
+            'admin': login(app, 'admin', 'admin123'),
+            'specialist': login(app, 'bench_specialist', 'bench123'),
+            'user': login(app, username, 'bench123'),
+            None: app.test_client()
+        }
+    )
+    os.remove(path)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    import cache
+    import page_cache
+    import principal
+    page_cache.fragments.clear()
+    cache.reference_cache.clear()
+    principal.principals.clear()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section('consultas SQL y memoria por petición')
+    terminalreporter.write_line(f'  {"caso":<34} {"consultas":>10} {"memoria KiB":>12}')
+    for name, queries, peak in RESULTS:
+        terminalreporter.write_line(f'  {name:<34} {queries:10d} {peak / 1024:12.0f}')
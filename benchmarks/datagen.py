@@ -0,0 +1,150 @@
+"""Generador de datos sintéticos para los benchmarks.
+
+Copia la base sembrada (instance/aves.db) a una ruta temporal y la llena con
+asociados, sus aves y premios, subcategorías colgando de las categorías raíz
+(la misma jerarquía que `flask seed`) y tipos de comida con precio, usando
+inserciones masivas sin pasar por el ORM.
+"""
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from werkzeug.security import generate_password_hash
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_DB = os.path.join(ROOT, 'instance', 'aves.db')
+
+FOOD_TYPES = ['Maíz', 'Trigo', 'Arroz en cáscara', 'Sorgo', 'Millo']
+VARIETIES = ['Lipocromo', 'Melánico', 'Mosaico', 'Timbrado', 'Malinois', 'Rizado', 'Mensajero',
+             'Buchona', 'Agapornis', 'Cotorra', 'Diamante', 'Faisán', 'Codorniz']
+FOOD_PROCESSES = ['grano', 'molido grueso', 'molido fino', 'sémola']
+POSITIONS = ['Gran Premio', '1er lugar', '2do lugar', '3er lugar', '4to lugar', 'mención especial']
+CONTESTS = ['Exposición Nacional', 'Copa Provincial', 'Feria de Primavera', 'Campeonato Regional']
+
+
+def scratch_database(name='bench'):
+    """Devuelve una copia temporal de la base sembrada y su URI."""
+    path = os.path.join(tempfile.mkdtemp(prefix='aves-'), f'{name}.db')
+    shutil.copyfile(SEED_DB, path)
+    return path, f'sqlite:///{path}'
+
+
+def bench_app(uri):
+    """Crea la aplicación sobre `uri` con el esquema al día (como `flask init-db`)."""
+    os.environ['DATABASE_URL'] = uri
+    from app import create_app
+    from commands import init_db
+    from models import db
+    import inventory
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+        # populate() inserta aves sin actualizar los totales precalculados
+        inventory.rebuild()
+        db.session.commit()
+    return app
+
+
+def add_categories(conn, rng, count):
+    """Agrega `count` subcategorías bajo las categorías raíz existentes."""
+    from models import BirdCategory
+
+    roots = conn.execute(
+        select(BirdCategory.name).where(BirdCategory.parent_category.is_(None))
+    ).scalars().all()
+    existing = set(conn.execute(select(BirdCategory.name)).scalars())
+    rows = []
+    for i in range(count):
+        parent = rng.choice(roots)
+        name = f'{parent} {rng.choice(VARIETIES)} {i + 1}'
+        if name not in existing:
+            rows.append({'name': name, 'parent_category': parent, 'resource_needs': 'Requerimientos básicos'})
+    if rows:
+        conn.execute(insert(BirdCategory.__table__), rows)
+
+
+def add_food_types(conn, rng):
+    """Da de alta con precio los tipos de comida que usan las aves generadas."""
+    from models import BirdFoodType
+
+    existing = set(conn.execute(select(BirdFoodType.name)).scalars())
+    rows = [{'name': name, 'price_per_pound': round(rng.uniform(100, 600), 2), 'is_active': True}
+            for name in FOOD_TYPES if name not in existing]
+    if rows:
+        conn.execute(insert(BirdFoodType.__table__), rows)
+
+
+def populate(uri, associates, birds_per_user=3, awards_per_user=0, categories=0, food_types=True,
+             seed=42, chunk=5000):
+    """Inserta `associates` usuarios asociados con sus aves y premios.
+
+    `categories` agrega subcategorías antes de repartir las aves y `food_types`
+    registra los tipos de comida con precio.
+    """
+    from models import User, UserBirds, BirdCategory, Award, sync_schema
+
+    rng = random.Random(seed)
+    engine = create_engine(uri)
+    # La copia de la base sembrada puede no tener las columnas nuevas
+    sync_schema(engine)
+    password_hash = generate_password_hash('bench123')
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        if categories:
+            add_categories(conn, rng, categories)
+        if food_types:
+            add_food_types(conn, rng)
+        category_ids = conn.execute(select(BirdCategory.id)).scalars().all()
+        first_id = (conn.execute(select(User.id).order_by(User.id.desc())).scalar() or 0) + 1
+
+        category_names = conn.execute(select(BirdCategory.name)).scalars().all()
+        users, birds, awards = [], [], []
+        for offset in range(associates):
+            user_id = first_id + offset
+            users.append({
+                'id': user_id,
+                'username': f'bench{user_id}',
+                'email': f'bench{user_id}@aves.com',
+                'password_hash': password_hash,
+                'role': 'user',
+                'is_associated': True,
+                'is_active': True,
+                'full_name': f'Asociado {user_id:06d}',
+                'phone': f'{50000000 + user_id}'
+            })
+            for category_id in rng.sample(category_ids, min(birds_per_user, len(category_ids))):
+                quantity = rng.randint(1, 200)
+                birds.append({
+                    'user_id': user_id,
+                    'category_id': category_id,
+                    'quantity': quantity,
+                    'export_quantity': rng.randint(0, quantity),
+                    'food_per_bird': round(rng.uniform(0.05, 0.5), 2),
+                    'food_type': rng.choice(FOOD_TYPES),
+                    'food_process': rng.choice(FOOD_PROCESSES),
+                    'last_updated': now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+                })
+            for _ in range(awards_per_user):
+                awards.append({
+                    'user_id': user_id,
+                    'contest_name': rng.choice(CONTESTS),
+                    'award_date': (now - timedelta(days=rng.randint(0, 365 * 5))).date(),
+                    'category': rng.choice(category_names),
+                    'position': rng.choice(POSITIONS)
+                })
+            if len(users) >= chunk:
+                conn.execute(insert(User.__table__), users)
+                users = []
+        if users:
+            conn.execute(insert(User.__table__), users)
+        for start in range(0, len(birds), chunk):
+            conn.execute(insert(UserBirds.__table__), birds[start:start + chunk])
+        for start in range(0, len(awards), chunk):
+            conn.execute(insert(Award.__table__), awards[start:start + chunk])
+
+    engine.dispose()
@@ -0,0 +1,78 @@
+"""Benchmark del módulo de previsión con arreglos sintéticos de 1M de filas.
+
+Uso:
+    python benchmarks/feed_forecast.py [--rows 1000000]
+
+Mide el cálculo vectorizado (compute_forecast) sobre filas individuales y, con
+--db, la carga desde una base generada, donde SQL ya agrupa la demanda diaria.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_columns(rows, seed=42):
+    from datagen import FOOD_TYPES, FOOD_PROCESSES
+
+    rng = np.random.default_rng(seed)
+    categories = [f'Categoría {i}' for i in range(8)]
+    food_per_bird = rng.uniform(0.05, 0.5, rows)
+    food_per_bird[rng.random(rows) < 0.05] = np.nan  # sin asignar
+    quantity = rng.integers(1, 200, rows).astype(np.float64)
+    return {
+        'daily': quantity * np.nan_to_num(food_per_bird),
+        'rows': np.ones(rows, dtype=np.int64),
+        'food_type': (rng.integers(0, len(FOOD_TYPES), rows).astype(np.int32), FOOD_TYPES),
+        'food_process': (rng.integers(0, len(FOOD_PROCESSES), rows).astype(np.int32), FOOD_PROCESSES),
+        'category': (rng.integers(0, len(categories), rows).astype(np.int32), categories),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--db', action='store_true', help='medir también la carga desde SQLite')
+    args = parser.parse_args()
+
+    from forecast import compute_forecast
+
+    columns = synthetic_columns(args.rows)
+    prices = {'Maíz': 0.35, 'Trigo': 0.42, 'Arroz en cáscara': 0.30, 'Sorgo': 0.28}
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for days in (30, 90):
+            compute_forecast(columns, prices, days)
+        timings.append(time.perf_counter() - start)
+    print(f'cálculo vectorizado, {args.rows} filas, 30 y 90 días: '
+          f'{statistics.median(timings) * 1000:.1f} ms')
+
+    if args.db:
+        from datagen import scratch_database, populate, bench_app
+        path, uri = scratch_database('forecast')
+        populate(uri, args.rows // 4, birds_per_user=4)
+
+        app = bench_app(uri)
+        import forecast
+        with app.app_context():
+            start = time.perf_counter()
+            loaded = forecast.load_columns()
+            load_time = time.perf_counter() - start
+            start = time.perf_counter()
+            forecast.compute_forecast(loaded, forecast.load_prices(), 30)
+            print(f'carga desde SQLite ({len(loaded["daily"])} grupos): {load_time * 1000:.1f} ms, '
+                  f'cálculo: {(time.perf_counter() - start) * 1000:.1f} ms')
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark de /login bajo un ataque de contraseñas incorrectas.
+
+Uso:
+    python benchmarks/login_throttle.py [--attackers 4] [--duration 10]
+                                        [--hash-method scrypt] [--ips 2]
+
+Varios hilos envían contraseñas incorrectas para usuarios existentes desde
+`--ips` direcciones mientras otro hilo inicia sesión con credenciales válidas
+desde una dirección distinta. Se compara el limitador desactivado, en memoria y
+en base de datos: intentos atendidos por segundo, cuántos se rechazaron sin
+calcular el hash (429) y la latencia de los inicios de sesión legítimos.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def attacker(app, usernames, ips, deadline, counts, seed):
+    rng = random.Random(seed)
+    client = app.test_client()
+    while time.perf_counter() < deadline:
+        response = client.post('/login', data={'username': rng.choice(usernames), 'password': 'incorrecta'},
+                               environ_base={'REMOTE_ADDR': rng.choice(ips)})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+
+
+def legitimate(app, usernames, deadline, latencies):
+    client = app.test_client()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = client.post('/login', data={'username': random.choice(usernames), 'password': 'bench123'},
+                               environ_base={'REMOTE_ADDR': '192.168.0.1'})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 302, response.status_code
+        client.get('/logout')
+
+
+def run(app, storage, usernames, args):
+    from models import db, LoginAttempt
+
+    app.config['LOGIN_THROTTLE_STORAGE'] = storage
+    app.extensions.pop('login_throttle', None)
+    with app.app_context():
+        db.session.execute(db.delete(LoginAttempt))
+        db.session.commit()
+
+    ips = [f'10.0.0.{i}' for i in range(1, args.ips + 1)]
+    deadline = time.perf_counter() + args.duration
+    counts, latencies = {}, []
+    threads = [threading.Thread(target=attacker, args=(app, usernames[1:], ips, deadline, counts, i))
+               for i in range(args.attackers)]
+    threads.append(threading.Thread(target=legitimate, args=(app, usernames[:1], deadline, latencies)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    attempts = sum(counts.values())
+    print(f'{storage or "sin límite":>10} | ataque {attempts / args.duration:8.1f} intentos/s, '
+          f'{counts.get(429, 0) / max(attempts, 1):5.0%} rechazados sin hash | '
+          f'login válido p50 {statistics.median(latencies) * 1000:7.1f} ms, '
+          f'{len(latencies) / args.duration:5.1f}/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--attackers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--ips', type=int, default=2)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--hash-method', default='scrypt')
+    args = parser.parse_args()
+
+    from datagen import scratch_database, populate, bench_app
+    path, uri = scratch_database('login')
+    populate(uri, args.users, birds_per_user=0)
+    app = bench_app(uri)
+    app.config['PASSWORD_HASH_METHOD'] = args.hash_method
+
+    from models import db, User
+    with app.app_context():
+        usernames = db.session.execute(
+            db.select(User.username).where(User.username.like('bench%'))
+        ).scalars().all()
+        # Las contraseñas ya quedan con el método elegido (sin rehash durante la prueba)
+        sample = User()
+        sample.set_password('bench123')
+        db.session.execute(db.update(User).where(User.username.like('bench%'))
+                           .values(password_hash=sample.password_hash))
+        db.session.commit()
+
+    print(f'{args.attackers} hilos atacantes desde {args.ips} IP, hash {args.hash_method}, '
+          f'{args.duration:.0f} s por prueba')
+    for storage in ('', 'memory', 'database'):
+        run(app, storage, usernames, args)
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark de exportación: memoria pico y tiempo al primer byte, HTML vs CSV/XLSX.
+
+Uso:
+    python benchmarks/report_export.py [--size 20000]
+
+Cada combinación (reporte, formato) corre en un proceso propio. La memoria pico
+se mide con tracemalloc durante la petición, por lo que los tiempos incluyen
+su sobrecoste; el RSS máximo del proceso se muestra como referencia.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+CASES = [
+    ('/reports/contact', 'html'), ('/reports/contact', 'csv'), ('/reports/contact', 'xlsx'),
+    ('/reports/awards', 'html'), ('/reports/awards', 'csv'), ('/reports/awards', 'xlsx'),
+    ('/reports/birds', 'csv'), ('/reports/birds', 'xlsx'),
+]
+
+
+def run_case(uri, url, fmt):
+    from datagen import bench_app
+    app = bench_app(uri)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench_specialist', 'password': 'bench123'})
+    tracemalloc.start()
+
+    query = '' if fmt == 'html' else f'?format={fmt}'
+    start = time.perf_counter()
+    response = client.get(url + query, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks, b'')
+    ttfb = time.perf_counter() - start
+    size = len(first) + sum(len(chunk) for chunk in chunks)
+    total = time.perf_counter() - start
+    response.close()
+    assert response.status_code == 200, response.status_code
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f'{url:<18} {fmt:<5} | primer byte: {ttfb * 1000:8.1f} ms | total: {total * 1000:8.1f} ms '
+          f'| {size / 1024:9.0f} KiB | memoria pico {peak / 2**20:7.1f} MiB | RSS {rss / 1024:6.0f} MiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000)
+    parser.add_argument('--case', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(*args.case)
+        return
+
+    from datagen import scratch_database, populate, bench_app
+    path, uri = scratch_database('export')
+    populate(uri, args.size, awards_per_user=2)
+
+    app = bench_app(uri)
+    from models import db, User
+    with app.app_context():
+        specialist = User(username='bench_specialist', email='specialist@bench.com',
+                          full_name='Especialista', phone='12345678', role='specialist')
+        specialist.set_password('bench123')
+        db.session.add(specialist)
+        db.session.commit()
+
+    print(f'{args.size} asociados')
+    for url, fmt in CASES:
+        subprocess.run([sys.executable, __file__, '--case', uri, url, fmt], check=True)
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
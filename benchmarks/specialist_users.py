@@ -0,0 +1,105 @@
+"""Benchmark de /specialist/users: consultas SQL y latencia por tamaño de club.
+
+Uso:
+    python benchmarks/specialist_users.py [--sizes 1000 10000 50000] [--repeat 5]
+
+Cada tamaño se ejecuta en un proceso aparte sobre una copia de instance/aves.db.
+Se compara la vista agregada actual con el cálculo antiguo en Python (un SELECT
+de aves por asociado).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def legacy_totals(db, User):
+    # Cálculo previo: una carga perezosa de user.birds por cada asociado
+    from sqlalchemy import select
+    data = []
+    for user in db.session.execute(select(User).where(User.is_associated == True)).scalars():
+        data.append((user.id,
+                     sum(b.quantity for b in user.birds),
+                     sum(b.food_required for b in user.birds if b.food_required),
+                     max((b.last_updated for b in user.birds if b.last_updated), default=None)))
+    return data
+
+
+def run_size(size, repeat, legacy_limit):
+    from datagen import scratch_database, populate, bench_app
+
+    path, uri = scratch_database(f'specialist_{size}')
+    populate(uri, size)
+
+    app = bench_app(uri)
+    from models import db, User
+
+    with app.app_context():
+        specialist = User(username='bench_specialist', email='specialist@bench.com',
+                          full_name='Especialista', phone='12345678', role='specialist')
+        specialist.set_password('bench123')
+        db.session.add(specialist)
+        db.session.commit()
+        counter = QueryCounter(db.engine)
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'bench_specialist', 'password': 'bench123'})
+
+    timings, queries = [], []
+    for _ in range(repeat):
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.get('/specialist/users')
+        timings.append(time.perf_counter() - start)
+        queries.append(counter.count)
+        assert response.status_code == 200, response.status_code
+
+    legacy = 'omitido'
+    if size <= legacy_limit:
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+            start = time.perf_counter()
+            legacy_totals(db, User)
+            legacy = f'{(time.perf_counter() - start) * 1000:9.1f} ms, {counter.count:6d} consultas'
+
+    print(f'{size:>7} asociados | vista: {statistics.median(timings) * 1000:8.1f} ms, '
+          f'{max(queries):3d} consultas | cálculo anterior: {legacy}')
+    os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--legacy-limit', type=int, default=10000,
+                        help='tamaño máximo para medir el cálculo anterior (es cuadrático)')
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size:
+        run_size(args.size, args.repeat, args.legacy_limit)
+        return
+    for size in args.sizes:
+        subprocess.run([sys.executable, __file__, '--size', str(size), '--repeat', str(args.repeat),
+                        '--legacy-limit', str(args.legacy_limit)],
+                       check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark de arranque: importación en frío y fork de workers.
+
+Uso:
+    python benchmarks/startup.py [--repeat 10] [--workers 4]
+
+"antes" reproduce el arranque previo a create_app: cada proceso, al importar la
+aplicación, verificaba el esquema, el índice FTS, los totales de inventario y los
+datos por defecto. "ahora" solo construye la app; ese trabajo queda en
+`flask init-db` / `flask seed`.
+
+Se mide, sobre una copia de instance/aves.db:
+  * importación en frío: proceso nuevo de Python hasta tener la app lista
+    (el caso de gunicorn sin preload_app, una vez por worker)
+  * fork: desde os.fork() hasta la primera respuesta del worker con la app ya
+    cargada en el maestro (preload_app)
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+COLD_IMPORT = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from app import create_app
+app = create_app()
+if {legacy}:
+    from commands import init_db, create_default_data
+    with app.app_context():
+        init_db()
+        create_default_data()
+print(time.perf_counter() - start)
+"""
+
+
+def cold_import(uri, legacy, repeat):
+    env = dict(os.environ, DATABASE_URL=uri)
+    code = COLD_IMPORT.format(root=ROOT, legacy=legacy)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', code], env=env, cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        timings.append((float(output.split()[-1]), time.perf_counter() - start))
+    return (statistics.median(t for t, _ in timings),
+            statistics.median(t for _, t in timings))
+
+
+def fork_workers(uri, legacy, workers):
+    os.environ['DATABASE_URL'] = uri
+    from app import create_app
+    from commands import init_db, create_default_data
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        db.engine.dispose()
+
+    timings = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            with app.app_context():
+                db.engine.dispose(close=False)
+                if legacy:
+                    init_db()
+                    create_default_data()
+            app.test_client().get('/login')
+            os.write(write_fd, b'.')
+            os._exit(0)
+        os.close(write_fd)
+        os.read(read_fd, 1)
+        timings.append(time.perf_counter() - start)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    from datagen import scratch_database, bench_app
+    path, uri = scratch_database('startup')
+    bench_app(uri)
+
+    print(f'importación en frío (mediana de {args.repeat} procesos)')
+    for label, legacy in (('antes', True), ('ahora', False)):
+        app_time, process_time = cold_import(uri, legacy, args.repeat)
+        print(f'  {label}: app lista en {app_time * 1000:7.1f} ms, '
+              f'proceso completo {process_time * 1000:7.1f} ms')
+
+    print(f'fork de workers con preload (mediana de {args.workers} workers)')
+    for label, legacy in (('antes', True), ('ahora', False)):
+        print(f'  {label}: primera respuesta en {fork_workers(uri, legacy, args.workers) * 1000:7.1f} ms')
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""Prueba de carga del perfil de producción (gunicorn) con 1, 4 y 8 workers.
+
+Uso:
+    python benchmarks/wsgi_load.py [--workers 1 4 8] [--clients 16] [--duration 10]
+                                   [--associates 2000] [--write-ratio 0.1]
+
+Para cada cantidad de workers se levanta gunicorn con gunicorn.conf.py sobre una
+copia de instance/aves.db y se lanzan `--clients` procesos cliente durante
+`--duration` segundos. Cada cliente alterna lecturas de /specialist/users con
+guardados del perfil (/profile) según `--write-ratio`. Se informa peticiones por
+segundo, latencia p50/p95 y errores. Con --database-url se usa otra base (por
+ejemplo PostgreSQL) en lugar de la copia SQLite.
+"""
+import argparse
+import http.client
+import math
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+FORM_HEADERS = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(port, method, path, body=None, cookie=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    headers = dict(FORM_HEADERS) if body is not None else {}
+    if cookie:
+        headers['Cookie'] = cookie
+    conn.request(method, path, body=urlencode(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response
+
+
+def login(port, username, password):
+    response = request(port, 'POST', '/login', {'username': username, 'password': password})
+    cookie = response.getheader('Set-Cookie')
+    assert response.status == 302 and cookie, f'login fallido para {username}'
+    return cookie.split(';', 1)[0]
+
+
+def client(args):
+    port, username, category_ids, duration, write_ratio, seed = args
+    rng = random.Random(seed)
+    specialist = login(port, 'bench_specialist', 'bench123')
+    user = login(port, username, 'bench123')
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        if rng.random() < write_ratio:
+            form = {'full_name': username, 'phone': '12345678', 'address': 'Calle 1'}
+            for category_id in category_ids:
+                form[f'category_{category_id}'] = rng.randint(0, 50)
+            response = request(port, 'POST', '/profile', form, user)
+        else:
+            response = request(port, 'GET', f'/specialist/users?page={rng.randint(1, 20)}', cookie=specialist)
+        latencies.append(time.perf_counter() - start)
+        if response.status >= 400:
+            errors += 1
+    return latencies, errors
+
+
+def prepare(associates, database_url):
+    if database_url:
+        return None, database_url
+    from datagen import scratch_database, populate
+    path, uri = scratch_database('wsgi_load')
+    populate(uri, associates)
+    return path, uri
+
+
+def add_specialist(uri):
+    from datagen import bench_app
+    from models import db, User, BirdCategory
+
+    app = bench_app(uri)
+
+    with app.app_context():
+        if not db.session.execute(db.select(User).filter_by(username='bench_specialist')).scalar():
+            specialist = User(username='bench_specialist', email='specialist@bench.com',
+                              full_name='Especialista', phone='12345678', role='specialist')
+            specialist.set_password('bench123')
+            db.session.add(specialist)
+            db.session.commit()
+        usernames = db.session.execute(
+            db.select(User.username).where(User.username.like('bench%'), User.role == 'user').limit(256)
+        ).scalars().all()
+        category_ids = db.session.execute(db.select(BirdCategory.id)).scalars().all()
+        db.engine.dispose()
+    return usernames, category_ids
+
+
+def wait_ready(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn terminó antes de aceptar conexiones')
+        try:
+            request(port, 'GET', '/login')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn no respondió a tiempo')
+
+
+def run_workers(workers, uri, usernames, category_ids, args):
+    port = free_port()
+    env = dict(os.environ, APP_ENV='production', SECRET_KEY='bench', DATABASE_URL=uri,
+               WEB_CONCURRENCY=str(workers), BIND=f'127.0.0.1:{port}')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, server)
+        jobs = [(port, usernames[i % len(usernames)], category_ids, args.duration, args.write_ratio, i)
+                for i in range(args.clients)]
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(client, jobs)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = sorted(l for result, _ in results for l in result)
+    errors = sum(e for _, e in results)
+    p95 = latencies[math.ceil(len(latencies) * 0.95) - 1] if latencies else 0  # rango más cercano
+    print(f'{workers:>3} workers | {len(latencies) / args.duration:8.1f} req/s | '
+          f'p50 {statistics.median(latencies) * 1000:7.1f} ms | p95 {p95 * 1000:7.1f} ms | '
+          f'{errors} errores')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--associates', type=int, default=2000)
+    parser.add_argument('--write-ratio', type=float, default=0.1)
+    parser.add_argument('--database-url', help='base existente (no se copia ni se llena)')
+    args = parser.parse_args()
+
+    path, uri = prepare(args.associates, args.database_url)
+    usernames, category_ids = add_specialist(uri)
+    print(f'{args.clients} clientes, {args.duration:.0f} s por prueba, '
+          f'{args.write_ratio:.0%} escrituras')
+    try:
+        for workers in args.workers:
+            run_workers(workers, uri, usernames, category_ids, args)
+    finally:
+        if path:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+from blueprints import auth, admin, specialist, dependiente, user, reports, api, media, jobs
+
+
+def register_blueprints(app):
+    for module in (auth, admin, specialist, dependiente, user, reports, api, media, jobs):
+        app.register_blueprint(module.bp)
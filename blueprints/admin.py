@@ -0,0 +1,190 @@
+import io
+from datetime import datetime, date
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+from flask_login import login_required, current_user
+from sqlalchemy import select, delete
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, User, UserBirds, Award
+import inventory
+import search
+import importer
+import history
+import standings
+import contests
+import principal
+from blueprints.reports import associates_report_page
+import page_cache
+
+bp = Blueprint('admin', __name__)
+
+@bp.route('/admin/users')
+@login_required
+def admin_users():
+    if current_user.role != 'admin':
+        abort(403)
+
+    # Obtener parámetros de filtrado
+    search_name = request.args.get('name', '').strip()
+    award_year = request.args.get('award_year', '').strip()
+    award_position = request.args.get('award_position', '').strip()  
+    after = request.args.get('after', 0, type=int)
+    per_page = max(min(request.args.get('per_page', 50, type=int), 200), 1)
+
+    # Consulta base (paginación por cursor sobre User.id)
+    query = select(User).where(User.id > after).order_by(User.id)
+
+    # Aplicar filtros
+    if search_name:
+        query = query.where(search.user_search_filter(search_name))
+
+    if award_year:
+        try:
+            year = int(award_year)
+            start_date = date(year, 1, 1)
+            end_date = date(year + 1, 1, 1)
+            
+            # Usuarios con premios en ese año
+            query = query.where(search.award_filter(
+                Award.award_date >= start_date,
+                Award.award_date < end_date
+            ))
+        except ValueError:
+            flash('Año de premio no válido', 'warning')
+
+    # Nuevo filtro por posición en premios
+    if award_position:
+        # Usuarios con premios en esa posición
+        query = query.where(search.award_filter(Award.position == award_position))
+
+    users = db.session.execute(query.limit(per_page + 1)).scalars().all()
+    next_after = users[per_page - 1].id if len(users) > per_page else None
+    users = users[:per_page]
+
+    # Pasar el año actual al template
+    current_year = datetime.now().year
+
+    return render_template('admin/users.html', 
+                         users=users, 
+                         search_name=search_name, 
+                         award_year=award_year,
+                         award_position=award_position,  
+                         after=after,
+                         next_after=next_after,
+                         per_page=per_page,
+                         current_year=current_year)
+
+@bp.route('/admin/assign_role/<int:user_id>', methods=['POST'])
+@login_required
+def assign_role(user_id):
+    if current_user.role != 'admin':
+        abort(403)
+
+    user = db.session.get(User, user_id)
+    if not user:
+        flash('Usuario no encontrado', 'danger')
+        return redirect(url_for('admin.admin_users'))
+
+    try:
+        is_associated = request.form.get('is_associated') == 'true'
+        if is_associated != user.is_associated:
+            inventory.set_associated(user, is_associated)
+        user.role = request.form['role']
+        user.is_associated = is_associated
+        db.session.commit()
+        principal.invalidate(user_id)
+        flash('Configuración de usuario actualizada', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al actualizar: {str(e)}', 'danger')
+
+    return redirect(url_for('admin.admin_users'))
+
+@bp.route('/admin/delete_user/<int:user_id>', methods=['POST'])
+@login_required
+def delete_user(user_id):
+    if current_user.role != 'admin':
+        abort(403)
+
+    user = db.session.get(User, user_id)
+    if not user:
+        flash('Usuario no encontrado', 'danger')
+    else:
+        try:
+            # Eliminar registros relacionados primero
+            inventory.remove_user(user)
+            history.remove_user(user_id)
+            db.session.execute(delete(UserBirds).where(UserBirds.user_id == user_id))
+            contests.remove_user(user_id)
+            db.session.execute(delete(Award).where(Award.user_id == user_id))
+            standings.remove_user(user_id)
+            db.session.delete(user)
+            db.session.commit()
+            principal.invalidate(user_id)
+            flash('Usuario eliminado correctamente', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error al eliminar usuario: {str(e)}', 'danger')
+
+    return redirect(url_for('admin.admin_users'))
+
+@bp.route('/admin/import', methods=['GET', 'POST'])
+@login_required
+def admin_import():
+    if current_user.role != 'admin':
+        abort(403)
+
+    result = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        kind = request.form.get('kind')
+        if not upload or not upload.filename:
+            flash('Seleccione un archivo CSV', 'warning')
+            return redirect(url_for('admin.admin_import'))
+        
+        # El archivo se lee en streaming, fila a fila
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        try:
+            if kind == 'awards':
+                result = importer.import_awards(stream)
+            else:
+                result = importer.import_birds(stream)
+            flash(f'Importación terminada: {result.inserted} insertados, '
+                  f'{result.updated} actualizados, {result.rejected} rechazados',
+                  'success' if not result.rejected else 'warning')
+        except (ValueError, UnicodeDecodeError) as e:
+            db.session.rollback()
+            flash(f'Archivo no válido: {str(e)}', 'danger')
+        except SQLAlchemyError as e:
+            # P. ej. un alta concurrente de la misma ave. Los lotes anteriores ya
+            # están confirmados: se recalculan los totales para incluirlos
+            db.session.rollback()
+            inventory.rebuild()
+            db.session.commit()
+            flash(f'Error al importar: {str(e)}', 'danger')
+
+    return render_template('admin/import.html',
+                         result=result,
+                         bird_columns=importer.BIRD_COLUMNS,
+                         award_columns=importer.AWARD_COLUMNS)
+
+@bp.route('/admin/user_details/<int:user_id>')
+@login_required
+def user_details(user_id):
+    if current_user.role != 'admin':
+        abort(403)
+
+    user = db.session.get(User, user_id)
+    if not user:
+        flash('Usuario no encontrado', 'danger')
+        return redirect(url_for('admin.admin_users'))
+
+    return render_template('admin/user_details.html', user=user)
+
+@bp.route('/admin/associates_report')
+@login_required
+@page_cache.conditional
+def associates_report_view():
+    if current_user.role != 'admin':
+        abort(403)
+
+    return associates_report_page()
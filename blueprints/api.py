@@ -0,0 +1,263 @@
+import gzip
+from datetime import date, datetime
+from functools import wraps
+
+from flask import Blueprint, request, jsonify, abort
+from flask_login import current_user
+from sqlalchemy import select
+from sqlalchemy.orm import load_only, selectinload
+from werkzeug.exceptions import HTTPException
+from models import db, User, UserBirds, Award, BirdCategory
+import cache
+import inventory
+import standings
+import contests
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+STAFF_ROLES = ['admin', 'specialist', 'dependiente']
+MAX_LIMIT = 200
+GZIP_MIN_SIZE = 1024
+
+# Campos expuestos por recurso (?fields=id,full_name). Los de contacto solo los
+# ven el propio usuario y el personal del club.
+USER_FIELDS = ('id', 'username', 'full_name', 'email', 'phone', 'address', 'role', 'is_associated')
+PRIVATE_USER_FIELDS = {'email', 'phone', 'address'}
+BIRD_FIELDS = ('id', 'category_id', 'category', 'quantity', 'export_quantity', 'food_per_bird',
+               'food_type', 'food_process', 'food_required', 'last_updated')
+AWARD_FIELDS = ('id', 'user_id', 'contest_name', 'award_date', 'category', 'position')
+USER_INCLUDES = ('birds', 'awards')
+
+
+def api_login_required(view):
+    # Sin sesión se responde 401 en JSON en lugar de redirigir al login
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            abort(401)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def staff_required(view):
+    @wraps(view)
+    @api_login_required
+    def wrapper(*args, **kwargs):
+        if current_user.role not in STAFF_ROLES:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@bp.errorhandler(HTTPException)
+def json_error(error):
+    return jsonify(error=error.name, message=error.description), error.code
+
+
+@bp.after_request
+def compress(response):
+    # gzip solo si el cliente lo acepta y el cuerpo compensa
+    if response.direct_passthrough or response.status_code != 200 \
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower():
+        return response
+    body = response.get_data()
+    if len(body) >= GZIP_MIN_SIZE:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def requested(param, allowed, default=None):
+    # Lista separada por comas validada contra los campos permitidos
+    value = request.args.get(param)
+    if not value:
+        return list(default if default is not None else allowed)
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        abort(400, f"{param} no válidos: {', '.join(unknown)}")
+    return names
+
+
+def page_params():
+    after = request.args.get('after', 0, type=int)
+    limit = max(min(request.args.get('limit', 50, type=int), MAX_LIMIT), 1)
+    return after, limit
+
+
+def serialize(obj, fields):
+    data = {}
+    for name in fields:
+        value = getattr(obj, name)
+        if name == 'category' and isinstance(obj, UserBirds):
+            value = value.name
+        elif isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        data[name] = value
+    return data
+
+
+def can_see_private(user_id):
+    return current_user.role in STAFF_ROLES or current_user.id == user_id
+
+
+def user_query(fields, includes):
+    # Proyección de columnas y carga en lote de las relaciones pedidas
+    columns = [getattr(User, name) for name in set(fields) | {'id'}]
+    query = select(User).options(load_only(*columns))
+    if 'birds' in includes:
+        query = query.options(selectinload(User.birds).selectinload(UserBirds.category))
+    if 'awards' in includes:
+        query = query.options(selectinload(User.awards))
+    return query
+
+
+def serialize_user(user, fields, includes):
+    visible = fields if can_see_private(user.id) else [f for f in fields if f not in PRIVATE_USER_FIELDS]
+    data = serialize(user, visible)
+    if 'birds' in includes:
+        data['birds'] = [serialize(bird, BIRD_FIELDS) for bird in user.birds]
+    if 'awards' in includes:
+        data['awards'] = [serialize(award, AWARD_FIELDS) for award in user.awards]
+    return data
+
+
+def get_user_or_404(user_id, fields=USER_FIELDS, includes=()):
+    if not can_see_private(user_id):
+        abort(403)
+    user = db.session.execute(user_query(fields, includes).where(User.id == user_id)).scalar()
+    if not user:
+        abort(404, 'Usuario no encontrado')
+    return user
+
+
+@bp.route('/me')
+@api_login_required
+def me():
+    fields = requested('fields', USER_FIELDS)
+    includes = requested('include', USER_INCLUDES, default=())
+    user = get_user_or_404(current_user.id, fields, includes)
+    return jsonify(serialize_user(user, fields, includes))
+
+
+@bp.route('/users')
+@staff_required
+def users():
+    fields = requested('fields', USER_FIELDS)
+    includes = requested('include', USER_INCLUDES, default=())
+    after, limit = page_params()
+
+    # Paginación por cursor sobre User.id (?after=<último id>)
+    query = user_query(fields, includes).where(User.id > after).order_by(User.id).limit(limit + 1)
+    if current_user.role != 'admin' or request.args.get('associated', 'true') == 'true':
+        query = query.where(User.is_associated == True)
+    rows = db.session.execute(query).scalars().all()
+
+    return jsonify(
+        data=[serialize_user(user, fields, includes) for user in rows[:limit]],
+        next_after=rows[limit - 1].id if len(rows) > limit else None
+    )
+
+
+@bp.route('/users/<int:user_id>')
+@api_login_required
+def user_detail(user_id):
+    fields = requested('fields', USER_FIELDS)
+    includes = requested('include', USER_INCLUDES, default=())
+    return jsonify(serialize_user(get_user_or_404(user_id, fields, includes), fields, includes))
+
+
+@bp.route('/users/<int:user_id>/birds')
+@api_login_required
+def user_birds(user_id):
+    fields = requested('fields', BIRD_FIELDS)
+    get_user_or_404(user_id, ('id',))
+    birds = db.session.execute(
+        select(UserBirds).where(UserBirds.user_id == user_id)
+        .options(selectinload(UserBirds.category))
+        .order_by(UserBirds.category_id)
+    ).scalars()
+    return jsonify(data=[serialize(bird, fields) for bird in birds])
+
+
+@bp.route('/users/<int:user_id>/awards')
+@api_login_required
+def user_awards(user_id):
+    fields = requested('fields', AWARD_FIELDS)
+    get_user_or_404(user_id, ('id',))
+    awards = db.session.execute(
+        select(Award).where(Award.user_id == user_id).order_by(Award.award_date.desc(), Award.id)
+    ).scalars()
+    return jsonify(data=[serialize(award, fields) for award in awards])
+
+
+@bp.route('/awards')
+@staff_required
+def awards():
+    fields = requested('fields', AWARD_FIELDS)
+    after, limit = page_params()
+
+    query = select(Award).where(Award.id > after).order_by(Award.id).limit(limit + 1)
+    year = request.args.get('year', type=int)
+    if year:
+        query = query.where(Award.award_date >= date(year, 1, 1), Award.award_date < date(year + 1, 1, 1))
+    if request.args.get('position'):
+        query = query.where(Award.position == request.args['position'])
+    rows = db.session.execute(query).scalars().all()
+
+    return jsonify(
+        data=[serialize(award, fields) for award in rows[:limit]],
+        next_after=rows[limit - 1].id if len(rows) > limit else None
+    )
+
+
+@bp.route('/categories')
+@api_login_required
+def categories():
+    return jsonify(data=[category._asdict() for category in cache.categories()])
+
+
+@bp.route('/inventory/categories')
+@staff_required
+def category_inventory():
+    # Totales por subárbol (?root=<id> limita a esa rama)
+    root_id = request.args.get('root', type=int)
+    if root_id is not None and not db.session.get(BirdCategory, root_id):
+        abort(404, 'Categoría no encontrada')
+    return jsonify(data=[
+        {'id': row.id, 'name': row.name, 'parent_id': row.parent_id,
+         'total_quantity': row.total_quantity, 'total_export': row.total_export,
+         'total_food': row.total_food}
+        for row in inventory.subtree_totals(root_id)
+    ])
+
+
+@bp.route('/leaderboard')
+@staff_required
+def leaderboard():
+    # ?scope=all|year|contest|category&key=<año, concurso o categoría>&limit=N
+    scope = request.args.get('scope', 'all')
+    if scope not in standings.SCOPES:
+        abort(400, f"scope no válido: {scope}")
+    key = request.args.get('key', '')
+    rows = standings.leaderboard(scope, key, request.args.get('limit', 10, type=int))
+    return jsonify(scope=scope, key=key, data=[
+        {'rank': rank, 'user_id': standing.user_id, 'full_name': full_name,
+         **{name: getattr(standing, name) for name in standings.COUNTERS}}
+        for rank, (standing, full_name, username) in enumerate(rows, 1)
+    ])
+
+
+@bp.route('/contests')
+@staff_required
+def contest_suggestions():
+    # Autocompletado por prefijo (?q=nac&limit=10)
+    rows = contests.suggest(request.args.get('q', ''), request.args.get('limit', 10, type=int))
+    return jsonify(data=[{'name': name, 'usage_count': usage_count} for name, usage_count in rows])
+
+
+@bp.route('/food_types')
+@api_login_required
+def food_types():
+    return jsonify(data=[food_type._asdict() for food_type in cache.active_food_types()])
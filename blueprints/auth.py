@@ -0,0 +1,75 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, login_required, current_user, logout_user
+from sqlalchemy import select, or_
+from models import db, User
+import throttle
+import principal
+
+bp = Blueprint('auth', __name__)
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        username = request.form['username']
+        
+        # Rechazar antes de consultar la base o calcular ningún hash
+        wait = throttle.retry_after(username, request.remote_addr)
+        if wait:
+            flash(f'Demasiados intentos fallidos. Intente de nuevo en {wait} segundos', 'danger')
+            return render_template('login.html'), 429, {'Retry-After': str(wait)}
+        
+        user = db.session.execute(
+            select(User).filter_by(username=username)
+        ).scalar()
+        if user and user.check_password(request.form['password']):
+            throttle.reset(username)
+            if user.password_needs_rehash():
+                # Los parámetros de hash cambiaron: actualizar con la contraseña en claro
+                user.set_password(request.form['password'])
+                db.session.commit()
+            login_user(principal.from_user(user))
+            return redirect(url_for('auth.dashboard'))
+        throttle.record_failure(username, request.remote_addr)
+        flash('Usuario o contraseña incorrectos', 'danger')
+    return render_template('login.html')
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        if db.session.execute(select(User).filter(or_(
+            User.username == request.form['username'],
+            User.email == request.form['email']
+        ))).scalar():
+            flash('Usuario o email ya registrado', 'danger')
+            return redirect(url_for('auth.register'))
+
+        user = User(
+            username=request.form['username'],
+            email=request.form['email'],
+            full_name=request.form['full_name'],
+            phone=request.form['phone'],
+            role='user',
+            is_associated=False
+        )
+        user.set_password(request.form['password'])
+        db.session.add(user)
+        db.session.commit()
+        flash('Registro exitoso. Inicia sesión', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('register.html')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('auth.login'))
+
+@bp.route('/')
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    if current_user.role == 'admin':
+        return redirect(url_for('admin.admin_users'))
+    elif current_user.role in ['specialist', 'dependiente']:  
+        return redirect(url_for('specialist.specialist_users'))
+    return redirect(url_for('user.profile'))
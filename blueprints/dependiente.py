@@ -0,0 +1,80 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+from flask_login import login_required, current_user
+from sqlalchemy import select
+from models import db, BirdFoodType
+import cache
+
+bp = Blueprint('dependiente', __name__)
+
+@bp.route('/food_types', methods=['GET', 'POST'])
+@login_required
+def manage_food_types():
+    if current_user.role != 'dependiente':
+        abort(403)
+
+    if request.method == 'POST':
+        # Procesar adición de nuevo tipo
+        name = request.form.get('food_name').strip()
+        price = float(request.form.get('price'))
+        
+        try:
+            new_food = BirdFoodType(name=name, price_per_pound=price)
+            db.session.add(new_food)
+            db.session.commit()
+            cache.invalidate('food_types')
+            flash(f'Tipo de comida "{name}" agregado correctamente', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error al agregar: {str(e)}', 'danger')
+        
+        return redirect(url_for('dependiente.manage_food_types'))
+
+    # Obtener todos los tipos de comida
+    food_types = db.session.execute(select(BirdFoodType).order_by(BirdFoodType.name)).scalars()
+    return render_template('dependiente/food_types.html', food_types=food_types)
+
+@bp.route('/update_food_price/<int:food_id>', methods=['POST'])
+@login_required
+def update_food_price(food_id):
+    if current_user.role != 'dependiente':
+        abort(403)
+
+    food = db.session.get(BirdFoodType, food_id)
+    if not food:
+        flash('Tipo de comida no encontrado', 'danger')
+        return redirect(url_for('dependiente.manage_food_types'))
+
+    try:
+        new_price = float(request.form.get('new_price'))
+        food.price_per_pound = new_price
+        db.session.commit()
+        cache.invalidate('food_types')
+        flash(f'Precio de {food.name} actualizado a ${new_price:.2f}/lb', 'success')
+    except ValueError:
+        flash('Precio no válido', 'danger')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al actualizar: {str(e)}', 'danger')
+
+    return redirect(url_for('dependiente.manage_food_types'))
+
+@bp.route('/delete_food_type/<int:food_id>', methods=['POST'])
+@login_required
+def delete_food_type(food_id):
+    if current_user.role != 'dependiente':
+        abort(403)
+
+    food = db.session.get(BirdFoodType, food_id)
+    if not food:
+        flash('Tipo de comida no encontrado', 'danger')
+    else:
+        try:
+            db.session.delete(food)
+            db.session.commit()
+            cache.invalidate('food_types')
+            flash('Tipo de comida eliminado correctamente', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error al eliminar: {str(e)}', 'danger')
+
+    return redirect(url_for('dependiente.manage_food_types'))
@@ -0,0 +1,80 @@
+import os
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify, send_file
+from flask_login import login_required, current_user
+from sqlalchemy import select
+from models import db, ReportJob
+import jobs
+
+bp = Blueprint('jobs', __name__, url_prefix='/reports/jobs')
+
+REPORT_ROLES = ['admin', 'specialist']
+MIMETYPES = {
+    'html': 'text/html',
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+
+def get_job_or_404(job_id):
+    job = db.session.get(ReportJob, job_id)
+    # Cada uno ve sus reportes; el admin, todos
+    if not job or (current_user.role != 'admin' and job.requested_by != current_user.id):
+        abort(404)
+    return job
+
+
+def job_status(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'format': job.format,
+        'status': job.status,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'size': job.size,
+        'error': job.error,
+        'download_url': url_for('jobs.download', job_id=job.id) if job.status == 'done' else None
+    }
+
+
+@bp.before_request
+@login_required
+def require_report_role():
+    if current_user.role not in REPORT_ROLES:
+        abort(403)
+
+
+@bp.route('', methods=['GET', 'POST'])
+def job_list():
+    if request.method == 'POST':
+        try:
+            job = jobs.enqueue(request.form.get('kind'), request.form.get('format'), current_user.id)
+            flash(f'Reporte #{job.id} en cola; estará disponible para descargar en esta página', 'success')
+        except ValueError as e:
+            flash(str(e), 'danger')
+        return redirect(url_for('jobs.job_list'))
+
+    query = select(ReportJob).order_by(ReportJob.id.desc()).limit(50)
+    if current_user.role != 'admin':
+        query = query.where(ReportJob.requested_by == current_user.id)
+    report_jobs = db.session.execute(query).scalars().all()
+
+    return render_template('reports/jobs.html',
+                         report_jobs=report_jobs,
+                         reports=jobs.REPORTS,
+                         pending=any(job.status in jobs.ACTIVE for job in report_jobs))
+
+
+@bp.route('/<int:job_id>')
+def status(job_id):
+    return jsonify(job_status(get_job_or_404(job_id)))
+
+
+@bp.route('/<int:job_id>/download')
+def download(job_id):
+    job = get_job_or_404(job_id)
+    path = jobs.result_path(job) if job.status == 'done' else None
+    if not path or not os.path.exists(path):
+        abort(404)
+    return send_file(path, mimetype=MIMETYPES[job.format], as_attachment=True,
+                     download_name=f'{job.kind}_{job.finished_at:%Y%m%d_%H%M}.{job.format}')
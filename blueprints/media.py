@@ -0,0 +1,43 @@
+import os
+from flask import Blueprint, current_app, send_file, abort, url_for
+from flask_login import login_required
+import images
+
+bp = Blueprint('media', __name__)
+
+
+@bp.app_template_global()
+def profile_thumbnail(user, variant='list'):
+    # URL de la miniatura del usuario o None si no subió imagen
+    if not user.profile_image:
+        return None
+    return url_for('media.profile_image', variant=variant, name=user.profile_image)
+
+
+@bp.route('/media/profile/<variant>/<name>')
+@login_required
+def profile_image(variant, name):
+    size = current_app.config['THUMBNAIL_SIZES'].get(variant)
+    if size is None or not images.NAME_RE.match(name):
+        abort(404)
+
+    folder = images.upload_folder()
+    path = images.thumbnail_path(folder, name, size)
+    if os.path.exists(path):
+        # El contenido de una URL no cambia nunca: caché larga e inmutable, y
+        # 304 si el navegador revalida con If-None-Match/If-Modified-Since
+        response = send_file(path, mimetype='image/jpeg', conditional=True,
+                             etag=f'{name}-{size}', max_age=current_app.config['IMAGE_MAX_AGE'])
+        response.cache_control.public = False
+        response.cache_control.private = True
+        response.cache_control.immutable = True
+        return response
+
+    # Miniatura todavía en preparación: se sirve el original sin caché
+    original = images.original_path(folder, name)
+    if not os.path.exists(original):
+        abort(404)
+    images.schedule_thumbnails(name)
+    response = send_file(original, conditional=True, max_age=0)
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,158 @@
+from datetime import datetime
+from flask import Blueprint, render_template, request, abort
+from flask_login import login_required, current_user
+from sqlalchemy import select, func
+from models import db, User, UserBirds, UserInventory
+import exports
+import inventory
+import page_cache
+import standings
+
+bp = Blueprint('reports', __name__)
+
+def associates_report_context():
+    # Totales por subárbol de categorías (cada categoría incluye sus subcategorías)
+    categories = [row._asdict() for row in inventory.subtree_totals()]
+
+    # Asociados con sus totales precalculados; las aves se cargan en lote
+    associates = db.session.execute(
+        select(User,
+               func.coalesce(UserInventory.total_quantity, 0),
+               func.coalesce(UserInventory.total_export, 0))
+        .outerjoin(UserInventory, UserInventory.user_id == User.id)
+        .where(User.is_associated == True)
+        .order_by(User.full_name)
+        .options(db.selectinload(User.birds).joinedload(UserBirds.category))
+    ).all()
+
+    return dict(
+        associates=[{'user': user, 'total_quantity': qty, 'total_export': exp}
+                    for user, qty, exp in associates],
+        categories=categories,
+        # Solo las raíces: sus totales ya incluyen los de las subcategorías
+        grand_total=sum(cat['total_quantity'] for cat in categories if cat['parent_id'] is None),
+        grand_export=sum(cat['total_export'] for cat in categories if cat['parent_id'] is None),
+        grand_food=round(sum(cat['total_food'] for cat in categories if cat['parent_id'] is None), 2)
+    )
+
+def associates_report_page(**context):
+    # Página del reporte de asociados (admin y especialista comparten el cuerpo)
+    body = page_cache.fragment('associates_report', lambda: render_template(
+        'admin/_associates_body.html', **associates_report_context()))
+    return render_template('admin/associates_report.html', body=body, **context)
+
+def contact_report_body():
+    associates = db.session.execute(
+        select(User).where(User.is_associated == True).order_by(User.full_name)
+    ).scalars()
+    return render_template('reports/_contact_body.html', associates=associates)
+
+def awards_report_body():
+    # Solución 1: Usar subqueryload en lugar de joinedload para colecciones
+    associates = db.session.execute(
+        select(User)
+        .where(User.is_associated == True)
+        .order_by(User.full_name)
+        .options(db.subqueryload(User.awards))  # Cambiado a subqueryload
+    ).scalars().unique().all()  # Añadido unique() y all()
+
+    # Solución alternativa 2: Si prefieres mantener joinedload
+    # associates = db.session.execute(
+    #     select(User)
+    #     .where(User.is_associated == True)
+    #     .order_by(User.full_name)
+    #     .options(db.joinedload(User.awards))
+    # ).unique().scalars().all()
+
+    return render_template('reports/_awards_body.html', associates=associates)
+
+@bp.route('/reports/contact')
+@login_required
+@page_cache.conditional
+def contact_report():
+    if current_user.role not in ['admin', 'specialist']:
+        abort(403)
+
+    # Exportación en streaming (?format=csv|xlsx)
+    export_format = request.args.get('format')
+    if export_format in exports.EXPORT_FORMATS:
+        return exports.export_response('contactos', exports.contact_rows, export_format)
+
+    return render_template('reports/contact_report.html',
+                         body=page_cache.fragment('contact_report', contact_report_body),
+                         now=datetime.utcnow())
+
+@bp.route('/reports/birds')
+@login_required
+def birds_report():
+    if current_user.role not in ['admin', 'specialist']:
+        abort(403)
+
+    # Exportación en streaming (?format=csv|xlsx)
+    export_format = request.args.get('format')
+    if export_format in exports.EXPORT_FORMATS:
+        return exports.export_response('aves', exports.birds_rows, export_format)
+
+    associates = db.session.execute(
+        select(User).where(User.is_associated == True)
+        .order_by(User.full_name)
+        .options(db.joinedload(User.birds).joinedload(UserBirds.category))
+    ).scalars()
+
+    return render_template('reports/birds_report.html',
+                         associates=associates,
+                         now=datetime.utcnow())
+
+@bp.route('/reports/awards')
+@login_required
+@page_cache.conditional
+def awards_report():
+    if current_user.role not in ['admin', 'specialist']:
+        abort(403)
+
+    # Exportación en streaming (?format=csv|xlsx)
+    export_format = request.args.get('format')
+    if export_format in exports.EXPORT_FORMATS:
+        return exports.export_response('premios', exports.awards_rows, export_format)
+
+    return render_template('reports/awards_report.html',
+                         body=page_cache.fragment('awards_report', awards_report_body),
+                         now=datetime.utcnow())
+
+@bp.route('/reports/leaderboard')
+@login_required
+def leaderboard():
+    if current_user.role not in ['admin', 'specialist']:
+        abort(403)
+
+    # Ámbito (?scope=year&key=2024); sin clave se toma la primera disponible
+    scope = request.args.get('scope', 'all')
+    if scope not in standings.SCOPES:
+        abort(400)
+    keys = standings.scope_keys(scope) if scope != 'all' else ['']
+    key = request.args.get('key', keys[0] if keys else '')
+    limit = request.args.get('limit', 10, type=int)
+
+    return render_template('reports/leaderboard.html',
+                         scopes=standings.SCOPES,
+                         scope=scope,
+                         keys=keys,
+                         key=key,
+                         limit=limit,
+                         rows=standings.leaderboard(scope, key, limit))
+
+@bp.route('/reports/forecast')
+@login_required
+def forecast_report():
+    if current_user.role not in ['admin', 'specialist', 'dependiente']:
+        abort(403)
+
+    # numpy se carga con la primera previsión, no al arrancar cada worker
+    import forecast
+
+    # Horizontes en días (?days=30&days=90)
+    horizons = [d for d in request.args.getlist('days', type=int) if 0 < d <= 365] or forecast.HORIZONS
+
+    return render_template('reports/forecast.html',
+                         forecasts=forecast.club_forecast(horizons),
+                         now=datetime.utcnow())
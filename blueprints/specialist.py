@@ -0,0 +1,315 @@
+from datetime import datetime
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy import select, func
+from sqlalchemy.orm.exc import StaleDataError
+from models import db, User, UserBirds, Award, ConflictError
+import cache
+import food_costs
+import feeding
+import history
+import inventory
+import standings
+import contests
+from blueprints.reports import associates_report_page
+import page_cache
+
+bp = Blueprint('specialist', __name__)
+
+@bp.route('/specialist/users')
+@login_required
+def specialist_users():
+    if current_user.role not in ['specialist', 'dependiente']:
+        abort(403)
+
+    # page y per_page acotados: 0 o negativos darían división por cero en el
+    # total de páginas y LIMIT/OFFSET negativos
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(min(request.args.get('per_page', 50, type=int), 200), 1)
+
+    # Totales por usuario calculados en SQL (una sola consulta agrupada)
+    totals = (
+        select(
+            UserBirds.user_id,
+            func.sum(UserBirds.quantity).label('total_birds'),
+            func.sum(UserBirds.food_required).label('total_food'),
+            func.max(UserBirds.last_updated).label('last_updated')
+        )
+        .group_by(UserBirds.user_id)
+        .subquery()
+    )
+
+    # Ordenar por usuarios con cambios recientes primero; el total de filas
+    # viaja en la misma consulta como función de ventana
+    rows = db.session.execute(
+        select(
+            User,
+            func.coalesce(totals.c.total_birds, 0),
+            func.coalesce(totals.c.total_food, 0.0),
+            totals.c.last_updated,
+            func.count().over().label('total_count')
+        )
+        .outerjoin(totals, totals.c.user_id == User.id)
+        .where(User.is_associated == True)
+        .order_by(totals.c.last_updated.desc().nulls_last(), User.full_name, User.id)
+        .limit(per_page)
+        .offset((page - 1) * per_page)
+    ).all()
+
+    # Cambios de la última semana desde el resumen diario del historial
+    weekly = history.weekly_changes([row[0].id for row in rows])
+
+    users_data = [{
+        'user': user,
+        'total_birds': total_birds,
+        'total_food': total_food,
+        'last_updated': last_updated,
+        'week_quantity_change': weekly.get(user.id, (0, 0.0))[0],
+        'week_food_change': weekly.get(user.id, (0, 0.0))[1]
+    } for user, total_birds, total_food, last_updated, _ in rows]
+
+    total_count = rows[0].total_count if rows else 0
+    pages = max((total_count + per_page - 1) // per_page, 1)
+
+    return render_template('specialist/users.html', 
+                         users=users_data,
+                         page=page,
+                         pages=pages,
+                         per_page=per_page,
+                         total_count=total_count,
+                         current_role=current_user.role)
+
+@bp.route('/specialist/user/<int:user_id>', methods=['GET', 'POST'])
+@login_required
+def manage_user(user_id):
+    # Permitir acceso a especialistas y dependientes
+    if current_user.role not in ['specialist', 'dependiente']:
+        abort(403)
+
+    user = db.session.get(User, user_id)
+    if not user or not user.is_associated:
+        flash('Usuario no asociado o no encontrado', 'danger')
+        return redirect(url_for('specialist.specialist_users'))
+
+    # Datos de referencia desde la caché (tipos de comida activos y categorías);
+    # los concursos se autocompletan desde /api/v1/contests
+    food_types = cache.active_food_types()
+    categories = cache.categories()
+
+    # Determinar si está en modo solo lectura (para dependientes)
+    read_only = current_user.role == 'dependiente'
+
+    def render_page(status=200):
+        return render_template('specialist/manage_user.html', 
+                             user=user,
+                             current_role=current_user.role,
+                             read_only=read_only,
+                             categories=categories,
+                             food_types=food_types,
+                             costs=food_costs.user_food_costs(user_id),
+                             events=history.recent_events(user_id)), status
+
+    if request.method == 'POST' and not read_only:
+        # Procesar actualizaciones de comida y nuevos campos. Sin autoflush
+        # para no escribir nada antes de revisar las versiones
+        events, stale = [], False
+        with db.session.no_autoflush:
+            for bird in user.birds:
+                old_food = bird.food_required
+                old_values = (bird.food_per_bird, bird.food_type, bird.food_process)
+
+                # Actualizar cantidad de comida
+                food_key = f'food_{bird.id}'
+                if food_key in request.form:
+                    try:
+                        bird.food_per_bird = float(request.form[food_key]) if request.form[food_key] else None
+                    except ValueError:
+                        flash(f'Valor inválido para {bird.category.name}', 'danger')
+
+                # Actualizar tipo de alimento
+                food_type_key = f'food_type_{bird.id}'
+                if food_type_key in request.form:
+                    bird.food_type = request.form[food_type_key]
+
+                # Actualizar proceso de alimento (solo si no es Arroz en cáscara)
+                food_process_key = f'food_process_{bird.id}'
+                if food_process_key in request.form and request.form.get(f'food_type_{bird.id}') != 'Arroz en cáscara':
+                    bird.food_process = request.form[food_process_key]
+                elif request.form.get(f'food_type_{bird.id}') == 'Arroz en cáscara':
+                    bird.food_process = None
+
+                if (bird.food_per_bird, bird.food_type, bird.food_process) == old_values:
+                    continue
+                # La fila cambió desde que se generó el formulario (version_<id>)
+                if request.form.get(f'version_{bird.id}', bird.version, type=int) != bird.version:
+                    stale = True
+                bird.last_updated = datetime.utcnow()
+
+                events.append({
+                    'user_id': user_id,
+                    'category_id': bird.category_id,
+                    'quantity': bird.quantity,
+                    'quantity_delta': 0,
+                    'food_required': bird.food_required,
+                    'food_delta': round(bird.food_required - old_food, 2)
+                })
+
+        try:
+            if stale:
+                raise ConflictError()
+            # Se escriben ya las aves: si otro guardó entre la lectura y ahora
+            # la versión no coincide y no se pisa su cambio
+            db.session.flush()
+        except (ConflictError, StaleDataError):
+            db.session.rollback()
+            flash(str(ConflictError()), 'warning')
+            return render_page(409)
+        if user.is_associated:
+            inventory.apply_food_deltas({event['category_id']: event['food_delta'] for event in events})
+        history.record(events, 'specialist')
+        
+        # Procesar nuevo premio (solo si se proporciona el nombre del concurso)
+        contest_name = (request.form.get('contest_name') or '').strip()
+        if contest_name:
+            award_date = request.form.get('award_date')
+            position = request.form.get('position')
+            
+            try:
+                award_date_obj = datetime.strptime(award_date, '%Y-%m-%d') if award_date else datetime.utcnow()
+                
+                if not position:
+                    flash('Debe seleccionar un puesto para el premio', 'danger')
+                else:
+                    award = Award(
+                        user_id=user_id,
+                        contest_name=contest_name,
+                        award_date=award_date_obj,
+                        position=position,
+                        category=request.form.get('award_category', '')
+                    )
+                    db.session.add(award)
+                    standings.apply([award])
+                    contests.record([contest_name])
+                    flash('Premio añadido correctamente', 'success')
+            except ValueError as e:
+                flash(f'Error al añadir premio: {str(e)}', 'danger')
+        
+        try:
+            db.session.commit()
+            flash('Datos actualizados correctamente', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error al guardar los datos: {str(e)}', 'danger')
+        
+        return redirect(url_for('specialist.manage_user', user_id=user_id))
+
+    return render_page()
+
+@bp.route('/specialist/bulk_feeding', methods=['GET', 'POST'])
+@login_required
+def bulk_feeding():
+    if current_user.role != 'specialist':
+        abort(403)
+
+    form = request.form if request.method == 'POST' else request.args
+    summary = None
+
+    if request.method == 'POST':
+        try:
+            category_id = int(form['category_id'])
+            values = feeding.new_values(form['food_type'], float(form['food_per_bird']),
+                                        form.get('food_process'))
+            assert values['food_type'], 'Debe seleccionar un tipo de comida'
+        except (KeyError, ValueError, AssertionError) as e:
+            flash(f'Datos no válidos: {str(e)}', 'danger')
+            return redirect(url_for('specialist.bulk_feeding'))
+        
+        conditions = feeding.criteria(category_id,
+                                      form.get('current_food_type'),
+                                      form.get('name', '').strip())
+        
+        if form.get('action') == 'apply':
+            try:
+                updated = feeding.apply(conditions, values)
+                db.session.commit()
+                flash(f'Alimentación actualizada en {updated} registros', 'success')
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error al actualizar: {str(e)}', 'danger')
+            return redirect(url_for('specialist.bulk_feeding'))
+        
+        summary = feeding.preview(conditions, values)
+
+    return render_template('specialist/bulk_feeding.html',
+                         form=form,
+                         summary=summary,
+                         categories=cache.categories(),
+                         food_types=cache.active_food_types())
+
+@bp.route('/specialist/user/<int:user_id>/food_costs')
+@login_required
+def user_food_costs(user_id):
+    if current_user.role not in ['specialist', 'dependiente']:
+        abort(403)
+
+    if not db.session.get(User, user_id):
+        abort(404)
+    return jsonify(food_costs.user_food_costs(user_id))
+
+@bp.route('/specialist/user/<int:user_id>/trend')
+@login_required
+def user_inventory_trend(user_id):
+    if current_user.role not in ['specialist', 'dependiente']:
+        abort(403)
+
+    days = min(max(request.args.get('days', 90, type=int), 1), 730)
+    return jsonify(history.daily_trend(user_id, days))
+
+@bp.route('/specialist/trend')
+@login_required
+def club_inventory_trend():
+    if current_user.role not in ['admin', 'specialist', 'dependiente']:
+        abort(403)
+
+    days = min(max(request.args.get('days', 90, type=int), 1), 730)
+    return jsonify(history.daily_trend(days=days))
+
+@bp.route('/specialist/food_costs')
+@login_required
+def club_food_costs():
+    if current_user.role not in ['admin', 'specialist', 'dependiente']:
+        abort(403)
+    return jsonify(food_costs.club_food_costs())
+
+@bp.route('/specialist/associates_report')
+@login_required
+@page_cache.conditional
+def specialist_associates_report():
+    if current_user.role != 'specialist':
+        abort(403)
+
+    # Reutilizamos la misma lógica que para admin
+    return associates_report_page(current_role=current_user.role)  # Añadimos el rol actual
+
+@bp.route('/delete_award/<int:award_id>', methods=['POST'])
+@login_required
+def delete_award(award_id):
+    if current_user.role not in ['admin', 'specialist']:
+        abort(403)
+
+    award = db.session.get(Award, award_id)
+    if not award:
+        flash('Premio no encontrado', 'danger')
+        return redirect(url_for('specialist.specialist_users'))
+
+    try:
+        standings.apply([award], -1)
+        contests.record([award.contest_name], -1)
+        db.session.delete(award)
+        db.session.commit()
+        flash('Premio eliminado correctamente', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al eliminar premio: {str(e)}', 'danger')
+
+    return redirect(url_for('specialist.manage_user', user_id=award.user_id))
@@ -0,0 +1,98 @@
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, abort
+from flask_login import login_required, current_user
+from sqlalchemy import select
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import RequestEntityTooLarge
+from models import db, Award, ConflictError
+import inventory
+import cache
+import principal
+import images
+
+bp = Blueprint('user', __name__)
+
+@bp.route('/profile', methods=['GET', 'POST'])
+@login_required
+def profile():
+    categories = cache.categories()
+    # current_user es el usuario cacheado; los datos y las aves salen del ORM
+    user = current_user.record()
+
+    if request.method == 'POST':
+        # Versiones con las que se generó el formulario; sin ellas (clientes
+        # antiguos) solo se comprueba al escribir
+        versions = None
+        if 'user_version' in request.form:
+            if request.form.get('user_version', type=int) != user.version:
+                return profile_conflict(user, categories)
+            versions = {category.id: request.form.get(f'version_{category.id}', 0, type=int)
+                        for category in categories}
+
+        # Actualizar datos personales
+        user.full_name = request.form['full_name']
+        user.phone = request.form['phone']
+        user.address = request.form['address']  
+        
+        # Actualizar cantidades de aves y exportación: {category_id: (cantidad, exportación)}
+        try:
+            submitted = {}
+            for category in categories:
+                quantity = int(request.form.get(f'category_{category.id}') or 0)
+                export_quantity = int(request.form.get(f'export_{category.id}') or 0)
+                submitted[category.id] = (quantity, min(export_quantity, quantity))  # Asegurar que no exceda
+            inventory.save_user_birds(user, submitted, versions=versions)
+            db.session.commit()
+        except (ConflictError, StaleDataError):
+            return profile_conflict(user, categories)
+        except (ValueError, AssertionError) as e:
+            db.session.rollback()
+            flash(f'Error al guardar las aves: {str(e)}', 'danger')
+            return redirect(url_for('user.profile'))
+        
+        principal.invalidate(user.id)
+        flash('Perfil actualizado correctamente', 'success')
+        return redirect(url_for('user.profile'))
+
+    return render_template('user/profile.html', user=user, categories=categories)
+
+def profile_conflict(user, categories):
+    # Se descartan los cambios y se muestran los valores actuales (409)
+    db.session.rollback()
+    flash(str(ConflictError()), 'warning')
+    return render_template('user/profile.html', user=user, categories=categories), 409
+
+@bp.route('/profile/image', methods=['POST'])
+@login_required
+def upload_profile_image():
+    # Límite propio de esta ruta: la lectura se corta al superarlo
+    request.max_content_length = current_app.config['MAX_IMAGE_BYTES']
+    try:
+        upload = request.files.get('image')
+    except RequestEntityTooLarge:
+        flash(f"La imagen supera {current_app.config['MAX_IMAGE_BYTES'] // (1024 * 1024)} MB", 'danger')
+        return redirect(url_for('user.profile'))
+    if not upload or not upload.filename:
+        flash('Selecciona una imagen', 'warning')
+        return redirect(url_for('user.profile'))
+
+    # Se guarda el original; las miniaturas se generan en segundo plano
+    name = images.save_upload(upload.stream)
+    if name is None:
+        flash('Formato no admitido (JPEG, PNG, GIF o WebP)', 'danger')
+        return redirect(url_for('user.profile'))
+
+    user = current_user.record()
+    user.profile_image = name
+    db.session.commit()
+    principal.invalidate(user.id)
+    flash('Imagen de perfil actualizada', 'success')
+    return redirect(url_for('user.profile'))
+
+@bp.route('/user/awards')
+@login_required
+def user_awards():
+    if current_user.role != 'user':
+        abort(403)
+    return render_template('user/awards.html',
+        awards=db.session.execute(select(Award).filter_by(user_id=current_user.id)).scalars().all()
+    )
@@ -0,0 +1,94 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from flask import g
+from sqlalchemy import select
+
+from models import db, BirdCategory, BirdFoodType
+
+
+class TTLCache:
+    # Caché LRU en memoria con expiración por entrada, segura entre hilos
+    def __init__(self, maxsize=128, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, loader):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Datos de referencia casi estáticos. Se guardan tuplas inmutables (no objetos
+# del ORM) para poder compartirlos entre peticiones; cada worker tiene su
+# propia copia y el TTL acota cuánto tarda en ver cambios hechos en otro.
+Category = namedtuple('Category', 'id name parent_category parent_id')
+FoodType = namedtuple('FoodType', 'id name price_per_pound')
+
+reference_cache = TTLCache(maxsize=32, ttl=300)
+
+
+def _cached(key, loader):
+    # Memo por petición encima de la caché compartida
+    memo = g.setdefault('reference_data', {})
+    if key not in memo:
+        memo[key] = reference_cache.get_or_set(key, loader)
+    return memo[key]
+
+
+def categories():
+    return _cached('categories', lambda: tuple(
+        Category(*row) for row in db.session.execute(
+            select(BirdCategory.id, BirdCategory.name, BirdCategory.parent_category, BirdCategory.parent_id)
+            .order_by(BirdCategory.id)
+        )
+    ))
+
+
+def active_food_types():
+    return _cached('food_types', lambda: tuple(
+        FoodType(*row) for row in db.session.execute(
+            select(BirdFoodType.id, BirdFoodType.name, BirdFoodType.price_per_pound)
+            .where(BirdFoodType.is_active == True)
+            .order_by(BirdFoodType.name)
+        )
+    ))
+
+
+def invalidate(*keys):
+    reference_cache.invalidate(*keys)
+    g.pop('reference_data', None)
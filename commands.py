@@ -0,0 +1,157 @@
+import os
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from models import db, User, BirdCategory, sync_schema
+import inventory
+import search
+import importer
+import images
+import jobs
+import standings
+import contests
+
+
+def create_default_data():
+    # Crear admin si no existe
+    if not db.session.execute(select(User).filter_by(username='admin')).scalar():
+        admin = User(
+            username='admin',
+            email='admin@aves.com',
+            role='admin',
+            full_name='Administrador Principal',
+            phone='0000000000',
+            is_associated=True
+        )
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+        print("✔ Admin creado: usuario='admin' / contraseña='admin123'")
+
+    # Crear categorías de aves si no existen
+    if not db.session.execute(select(BirdCategory)).scalar():
+        categories = [
+            {'name': 'Canario de color', 'parent': None},
+            {'name': 'Canario de canto', 'parent': None},
+            {'name': 'Aves exóticas', 'parent': None},
+            {'name': 'Psitácidas', 'parent': None},
+            {'name': 'Paloma de raza', 'parent': None},
+            {'name': 'Paloma de fantasía', 'parent': 'Paloma de raza'},
+            {'name': 'Paloma deportiva', 'parent': 'Paloma de raza'},
+            {'name': 'Gallináceas', 'parent': None}
+        ]
+        for cat in categories:
+            db.session.add(BirdCategory(
+                name=cat['name'],
+                parent_category=cat['parent'],
+                resource_needs='Requerimientos básicos'
+            ))
+            # Una por una, en el orden de la lista (ids estables); el padre ya
+            # existe cuando before_insert lo busca por nombre
+            db.session.flush()
+        db.session.commit()
+
+def init_db():
+    # Crea tablas, índices y el índice de texto completo que falten
+    sync_schema()
+    search.ensure_user_fts()
+    inventory.ensure_rollups()
+    inventory.ensure_category_paths()
+    standings.ensure_standings()
+    contests.ensure_contests()
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    init_db()
+    print('✔ Esquema de base de datos actualizado')
+
+@click.command('seed')
+@with_appcontext
+def seed_command():
+    create_default_data()
+    print('✔ Datos por defecto verificados')
+
+@click.command('rebuild-inventory')
+@with_appcontext
+def rebuild_inventory_command():
+    inventory.rebuild()
+    db.session.commit()
+    print('✔ Totales de inventario recalculados')
+
+@click.command('rebuild-standings')
+@with_appcontext
+def rebuild_standings_command():
+    standings.rebuild()
+    db.session.commit()
+    print('✔ Clasificaciones de premios recalculadas')
+
+@click.command('import-birds')
+@with_appcontext
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_birds_command(path):
+    with open(path, newline='', encoding='utf-8-sig') as stream:
+        result = importer.import_birds(stream)
+    _print_import_result(result)
+
+@click.command('import-awards')
+@with_appcontext
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+def import_awards_command(path):
+    with open(path, newline='', encoding='utf-8-sig') as stream:
+        result = importer.import_awards(stream)
+    _print_import_result(result)
+
+def _print_import_result(result):
+    print(f'✔ {result.inserted} insertados, {result.updated} actualizados, {result.rejected} rechazados')
+    for error in result.errors:
+        print(f'  {error}')
+
+@click.command('forecast')
+@with_appcontext
+@click.option('--days', '-d', multiple=True, type=int, help='Horizonte en días (repetible)')
+def forecast_command(days):
+    import forecast
+    for result in forecast.club_forecast(days or forecast.HORIZONS):
+        print(f"Próximos {result['days']} días: {result['total']['pounds']:.2f} lb, "
+              f"${result['total']['cost']:.2f}")
+        for group in result['by_food_type']:
+            print(f"  {group['name']:<30} {group['pounds']:>14.2f} lb  ${group['cost']:>14.2f}")
+        if result['missing_prices']:
+            print(f"  Sin precio: {', '.join(result['missing_prices'])}")
+
+@click.command('thumbnails')
+@with_appcontext
+def thumbnails_command():
+    # Genera las miniaturas que falten (p. ej. tras cambiar THUMBNAIL_SIZES)
+    folder = images.upload_folder()
+    sizes = tuple(sorted(set(current_app.config['THUMBNAIL_SIZES'].values())))
+    names = db.session.execute(
+        select(User.profile_image).where(User.profile_image.is_not(None)).distinct()
+    ).scalars().all()
+    for name in names:
+        if images.NAME_RE.match(name) and os.path.exists(images.original_path(folder, name)):
+            images.make_thumbnails(folder, name, sizes)
+    print(f'✔ Miniaturas verificadas para {len(names)} imágenes')
+
+@click.command('jobs-worker')
+@with_appcontext
+@click.option('--threads', type=int, help='Reportes en paralelo en este proceso (por defecto REPORT_JOB_CONCURRENCY)')
+@click.option('--poll', default=2.0, help='Segundos entre consultas a la cola vacía')
+@click.option('--once', is_flag=True, help='Terminar cuando la cola quede vacía')
+def jobs_worker_command(threads, poll, once):
+    # Proceso aparte de gunicorn: genera los reportes encolados desde la web
+    app = current_app._get_current_object()
+    threads = threads or app.config['REPORT_JOB_CONCURRENCY']
+    print(f'✔ Worker de reportes con {threads} hilos')
+    jobs.work(app, threads, poll, once)
+
+commands = (init_db_command, seed_command, rebuild_inventory_command, rebuild_standings_command,
+            import_birds_command, import_awards_command, forecast_command, thumbnails_command,
+            jobs_worker_command)
+
+
+def register_commands(app):
+    for command in commands:
+        app.cli.add_command(command)
@@ -0,0 +1,107 @@
+import os
+
+
+def database_uri():
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///aves.db')
+    # Algunos proveedores todavía entregan el esquema antiguo de PostgreSQL
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'tu_clave_secreta_aqui')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    UPLOAD_FOLDER = 'static/uploads/profile_images'
+
+    # Imágenes de perfil: tamaño máximo de la subida, lado en píxeles de cada
+    # miniatura, hilos que las generan y caché del navegador (ver images.py)
+    MAX_IMAGE_BYTES = env_int('MAX_IMAGE_BYTES', 5 * 1024 * 1024)
+    THUMBNAIL_SIZES = {'list': 48, 'profile': 160}
+    IMAGE_WORKERS = env_int('IMAGE_WORKERS', 2)
+    IMAGE_MAX_AGE = 365 * 24 * 3600
+    DEBUG = False
+
+    # Método de hash para contraseñas nuevas ('scrypt', 'scrypt:16384:8:1',
+    # 'pbkdf2:sha256:600000'...); las existentes se rehashean al iniciar sesión
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+    # Límite de intentos fallidos de inicio de sesión por usuario y por IP en
+    # una ventana deslizante. 'memory' cuenta por worker, 'database' comparte
+    # el conteo entre workers; vacío lo desactiva
+    LOGIN_THROTTLE_STORAGE = os.environ.get('LOGIN_THROTTLE_STORAGE', 'memory')
+    LOGIN_THROTTLE_WINDOW = env_int('LOGIN_THROTTLE_WINDOW', 300)
+    LOGIN_THROTTLE_USER_LIMIT = env_int('LOGIN_THROTTLE_USER_LIMIT', 5)
+    LOGIN_THROTTLE_IP_LIMIT = env_int('LOGIN_THROTTLE_IP_LIMIT', 20)
+
+    # Instrumentación por petición (SQL, plantillas, latencia) con /metrics y
+    # Server-Timing. QUERY_BUDGET avisa en el log de las peticiones con más
+    # consultas; METRICS_TOKEN exige 'Authorization: Bearer <token>' en /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    QUERY_BUDGET = env_int('QUERY_BUDGET', 30)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Reportes en segundo plano (ver jobs.py): carpeta de resultados (por
+    # defecto instance/report_jobs), reportes en paralelo en todo el sistema,
+    # pendientes por usuario, segundos que se conservan los resultados y
+    # máximo de resultados guardados. Un trabajo que lleva más de
+    # REPORT_JOB_TIMEOUT segundos en curso se da por caído y vuelve a la cola
+    REPORT_JOB_FOLDER = os.environ.get('REPORT_JOB_FOLDER')
+    REPORT_JOB_CONCURRENCY = env_int('REPORT_JOB_CONCURRENCY', 2)
+    REPORT_JOB_USER_LIMIT = env_int('REPORT_JOB_USER_LIMIT', 3)
+    REPORT_JOB_RETENTION = env_int('REPORT_JOB_RETENTION', 24 * 3600)
+    REPORT_JOB_MAX_RESULTS = env_int('REPORT_JOB_MAX_RESULTS', 100)
+    REPORT_JOB_TIMEOUT = env_int('REPORT_JOB_TIMEOUT', 1800)
+
+    # PRAGMAs aplicados a cada conexión SQLite nueva
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = env_int('SQLITE_BUSY_TIMEOUT', 5000)
+
+    @staticmethod
+    def engine_options(uri):
+        if uri.startswith('sqlite'):
+            # SQLite usa el pool por defecto de SQLAlchemy; la espera por el
+            # bloqueo de escritura la resuelve busy_timeout
+            return {}
+        return {
+            'pool_size': env_int('DB_POOL_SIZE', 5),
+            'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': env_int('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': True
+        }
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+
+
+class ProductionConfig(Config):
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    LOGIN_THROTTLE_STORAGE = os.environ.get('LOGIN_THROTTLE_STORAGE', 'database')
+
+
+configs = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig
+}
+
+
+def load_config(app, name=None):
+    name = name or os.environ.get('APP_ENV', 'development')
+    if name not in configs:
+        raise RuntimeError(f'APP_ENV desconocido: {name}')
+    config = configs[name]
+    if not config.SECRET_KEY:
+        raise RuntimeError('SECRET_KEY es obligatoria en producción')
+    app.config.from_object(config)
+    # La URI se lee al crear la app, no al importar el módulo
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = config.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    return config
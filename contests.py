@@ -0,0 +1,67 @@
+import unicodedata
+from collections import Counter
+
+from sqlalchemy import select, delete, func
+from models import db, Award, Contest, upsert
+
+MAX_SUGGESTIONS = 20
+
+
+def search_key(text):
+    # 'Exposición Nacional' -> 'exposicion nacional'
+    decomposed = unicodedata.normalize('NFKD', text.strip().casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def record(names, sign=1):
+    # Suma (o resta con sign=-1) usos de cada nombre; los que quedan sin usos se borran
+    counts = Counter(names)
+    if not counts:
+        return
+    stmt = upsert(Contest)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'usage_count': Contest.usage_count + stmt.excluded.usage_count}
+    )
+    db.session.execute(stmt, [
+        {'name': name, 'search_key': search_key(name), 'usage_count': sign * count}
+        for name, count in counts.items()
+    ])
+    if sign < 0:
+        db.session.execute(delete(Contest).where(Contest.name.in_(counts), Contest.usage_count <= 0))
+
+
+def remove_user(user_id):
+    # Antes de borrar en lote los premios de un usuario
+    record(dict(db.session.execute(
+        select(Award.contest_name, func.count())
+        .where(Award.user_id == user_id)
+        .group_by(Award.contest_name)
+    ).all()), -1)
+
+
+def suggest(prefix, limit=10):
+    # Coincidencias por prefijo sobre el índice de search_key, las más usadas primero
+    key = search_key(prefix)
+    query = select(Contest.name, Contest.usage_count)
+    if key:
+        query = query.where(Contest.search_key >= key, Contest.search_key < key + '\uffff')
+    return db.session.execute(
+        query.order_by(Contest.usage_count.desc(), Contest.name)
+        .limit(max(min(limit, MAX_SUGGESTIONS), 1))
+    ).all()
+
+
+def rebuild():
+    db.session.execute(delete(Contest))
+    record(dict(db.session.execute(
+        select(Award.contest_name, func.count()).group_by(Award.contest_name)
+    ).all()))
+
+
+def ensure_contests():
+    # Bases anteriores: llena el diccionario desde los premios existentes
+    if db.session.execute(select(Contest.id).limit(1)).first() is None \
+            and db.session.execute(select(Award.id).limit(1)).first() is not None:
+        rebuild()
+        db.session.commit()
@@ -0,0 +1,124 @@
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+from flask import Response, stream_with_context, send_file, abort
+from sqlalchemy import select
+
+from models import db, User, UserBirds, BirdCategory, Award
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+YIELD_PER = 1000  # Filas leídas por lote del cursor
+
+
+def birds_rows():
+    # Una fila por ave registrada, leída en lotes desde la base
+    stmt = (
+        select(User.full_name, User.username, BirdCategory.name,
+               UserBirds.quantity, UserBirds.export_quantity,
+               UserBirds.food_type, UserBirds.food_process, UserBirds.food_per_bird)
+        .join(UserBirds, UserBirds.user_id == User.id)
+        .join(BirdCategory, BirdCategory.id == UserBirds.category_id)
+        .where(User.is_associated == True)
+        .order_by(User.full_name, User.id, BirdCategory.name)
+    )
+    header = ['Nombre', 'Usuario', 'Categoría', 'Cantidad', 'Exportación',
+              'Tipo de comida', 'Proceso', 'Comida/Ave (lb)']
+    return header, stmt
+
+
+def awards_rows():
+    # Asociados sin premios aparecen con las columnas del premio vacías
+    stmt = (
+        select(User.full_name, Award.contest_name, Award.award_date,
+               Award.category, Award.position)
+        .outerjoin(Award, Award.user_id == User.id)
+        .where(User.is_associated == True)
+        .order_by(User.full_name, User.id, Award.award_date)
+    )
+    header = ['Usuario', 'Concurso', 'Fecha', 'Categoría', 'Posición']
+    return header, stmt
+
+
+def contact_rows():
+    stmt = (
+        select(User.full_name, User.email, User.phone, User.address)
+        .where(User.is_associated == True)
+        .order_by(User.full_name, User.id)
+    )
+    header = ['Nombre Completo', 'Email', 'Teléfono', 'Dirección']
+    return header, stmt
+
+
+def _iter_rows(stmt):
+    result = db.session.execute(stmt.execution_options(yield_per=YIELD_PER))
+    for partition in result.partitions():
+        yield from partition
+
+
+def _csv_stream(header, stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM para que Excel detecte UTF-8
+    writer.writerow(header)
+    for count, row in enumerate(_iter_rows(stmt), 1):
+        writer.writerow(['' if value is None else value for value in row])
+        if count % YIELD_PER == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _xlsx_file(header, stmt, output=None):
+    # El modo write_only escribe las filas a disco a medida que llegan
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in _iter_rows(stmt):
+        sheet.append(list(row))
+    output = output or tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def write_export(rows, fmt, path):
+    # Mismo contenido que la descarga directa, escrito a un archivo (reportes en segundo plano)
+    header, stmt = rows()
+    if fmt == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as output:
+            for chunk in _csv_stream(header, stmt):
+                output.write(chunk)
+    elif fmt == 'xlsx':
+        with open(path, 'wb') as output:
+            _xlsx_file(header, stmt, output)
+    else:
+        raise ValueError(f'Formato no soportado: {fmt}')
+
+
+def export_response(name, rows, fmt):
+    header, stmt = rows()
+    filename = f'{name}_{datetime.utcnow():%Y%m%d_%H%M}.{fmt}'
+
+    if fmt == 'csv':
+        return Response(
+            stream_with_context(_csv_stream(header, stmt)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    if fmt == 'xlsx':
+        try:
+            output = _xlsx_file(header, stmt)
+        except ImportError:
+            abort(501, description='La exportación a XLSX requiere openpyxl')
+        return send_file(
+            output,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=filename
+        )
+    abort(400)
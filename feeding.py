@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from sqlalchemy import select, update, func
+
+from models import db, User, UserBirds, BirdCategory, check_food_per_bird
+import search
+import history
+import inventory
+
+NO_PROCESS_FOOD = 'Arroz en cáscara'  # Se da entero, sin proceso
+PREVIEW_ROWS = 20
+
+
+def criteria(category_id, current_food_type=None, name=None):
+    # Aves de la categoría pertenecientes a asociados (opcionalmente filtradas)
+    users = select(User.id).where(User.is_associated == True)
+    if name:
+        users = users.where(search.user_search_filter(name))
+    conditions = [UserBirds.category_id == category_id, UserBirds.user_id.in_(users)]
+    if current_food_type == '__none__':
+        conditions.append(UserBirds.food_type.is_(None))
+    elif current_food_type:
+        conditions.append(UserBirds.food_type == current_food_type)
+    return conditions
+
+
+def new_values(food_type, food_per_bird, food_process):
+    return {
+        'food_type': food_type,
+        'food_per_bird': check_food_per_bird(food_per_bird),
+        'food_process': None if food_type == NO_PROCESS_FOOD else (food_process or None)
+    }
+
+
+def preview(conditions, values):
+    rows, users, birds, current_food = db.session.execute(
+        select(func.count(UserBirds.id),
+               func.count(UserBirds.user_id.distinct()),
+               func.coalesce(func.sum(UserBirds.quantity), 0),
+               func.coalesce(func.sum(UserBirds.food_required), 0.0))
+        .where(*conditions)
+    ).one()
+
+    sample = db.session.execute(
+        select(User.full_name, BirdCategory.name, UserBirds.quantity, UserBirds.food_type,
+               UserBirds.food_process, UserBirds.food_per_bird)
+        .join(User, User.id == UserBirds.user_id)
+        .join(BirdCategory, BirdCategory.id == UserBirds.category_id)
+        .where(*conditions)
+        .order_by(User.full_name)
+        .limit(PREVIEW_ROWS)
+    ).all()
+
+    return {
+        'rows': rows,
+        'users': users,
+        'birds': birds,
+        'current_food': round(current_food, 2),
+        'new_food': round(birds * values['food_per_bird'], 2),
+        'sample': sample
+    }
+
+
+def apply(conditions, values):
+    # Un solo UPDATE para todas las filas afectadas (el historial se escribe
+    # antes, con otro INSERT ... SELECT sobre las mismas filas)
+    history.record_food_update(conditions, values['food_per_bird'], 'bulk')
+    # Diferencia de alimento por categoría para los totales precalculados
+    new_food = func.round(UserBirds.quantity * (values['food_per_bird'] or 0), 2)
+    food = dict(db.session.execute(
+        select(UserBirds.category_id, func.sum(new_food) - func.sum(UserBirds.food_required))
+        .join(User, User.id == UserBirds.user_id)
+        .where(User.is_associated == True, *conditions)
+        .group_by(UserBirds.category_id)
+    ).all())
+    result = db.session.execute(
+        update(UserBirds)
+        .where(*conditions)
+        .values(last_updated=datetime.utcnow(), version=UserBirds.version + 1, **values)
+        .execution_options(synchronize_session=False)
+    )
+    inventory.apply_food_deltas(food)
+    return result.rowcount
@@ -0,0 +1,74 @@
+from sqlalchemy import select, func
+
+from models import db, User, UserBirds, BirdCategory, BirdFoodType
+
+DAYS_PER_MONTH = 30
+
+# Precio por libra según el nombre del tipo de comida asignado al ave
+price_per_pound = func.coalesce(BirdFoodType.price_per_pound, 0.0)
+daily_cost = UserBirds.food_required * price_per_pound
+
+
+def _amounts(daily_food, cost):
+    daily_food = daily_food or 0.0
+    cost = cost or 0.0
+    return {
+        'daily_food': round(daily_food, 2),
+        'daily_cost': round(cost, 2),
+        'monthly_food': round(daily_food * DAYS_PER_MONTH, 2),
+        'monthly_cost': round(cost * DAYS_PER_MONTH, 2)
+    }
+
+
+def user_food_costs(user_id):
+    # Coste por ave y total del usuario en una sola consulta
+    rows = db.session.execute(
+        select(UserBirds.id, BirdCategory.name, UserBirds.food_type,
+               BirdFoodType.price_per_pound, UserBirds.food_required, daily_cost)
+        .join(BirdCategory, BirdCategory.id == UserBirds.category_id)
+        .outerjoin(BirdFoodType, BirdFoodType.name == UserBirds.food_type)
+        .where(UserBirds.user_id == user_id)
+    ).all()
+
+    birds = {}
+    total_food = total_cost = 0.0
+    for bird_id, category, food_type, price, food, cost in rows:
+        birds[bird_id] = dict(category=category, food_type=food_type,
+                              price_per_pound=price, **_amounts(food, cost))
+        total_food += food or 0.0
+        total_cost += cost or 0.0
+
+    return {'birds': birds, 'total': _amounts(total_food, total_cost)}
+
+
+def club_food_costs():
+    # Totales por asociado y por tipo de comida para todo el club
+    food = func.sum(UserBirds.food_required)
+    cost = func.sum(daily_cost)
+
+    per_user = db.session.execute(
+        select(User.id, User.full_name, food, cost)
+        .join(UserBirds, UserBirds.user_id == User.id)
+        .outerjoin(BirdFoodType, BirdFoodType.name == UserBirds.food_type)
+        .where(User.is_associated == True)
+        .group_by(User.id, User.full_name)
+        .order_by(User.full_name)
+    ).all()
+
+    per_food_type = db.session.execute(
+        select(UserBirds.food_type, BirdFoodType.price_per_pound, food, cost)
+        .join(User, User.id == UserBirds.user_id)
+        .outerjoin(BirdFoodType, BirdFoodType.name == UserBirds.food_type)
+        .where(User.is_associated == True)
+        .group_by(UserBirds.food_type, BirdFoodType.price_per_pound)
+        .order_by(UserBirds.food_type)
+    ).all()
+
+    return {
+        'users': [dict(user_id=user_id, full_name=name, **_amounts(f, c))
+                  for user_id, name, f, c in per_user],
+        'food_types': [dict(food_type=food_type, price_per_pound=price, **_amounts(f, c))
+                       for food_type, price, f, c in per_food_type],
+        'total': _amounts(sum(f or 0.0 for *_, f, c in per_user),
+                          sum(c or 0.0 for *_, f, c in per_user))
+    }
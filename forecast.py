@@ -0,0 +1,93 @@
+import numpy as np
+from sqlalchemy import select, func
+
+from cache import reference_cache
+from models import db, User, UserBirds, BirdCategory, BirdFoodType, data_version
+
+HORIZONS = (30, 90)
+UNSPECIFIED = 'No especificado'
+
+
+def _encode(values):
+    # Codifica una columna de texto como enteros (índice en `labels`)
+    lookup = {}
+    codes = np.fromiter(
+        (lookup.setdefault(value or UNSPECIFIED, len(lookup)) for value in values),
+        dtype=np.int32, count=len(values)
+    )
+    labels = sorted(lookup, key=lookup.get)
+    return codes, labels
+
+
+def load_columns():
+    # La demanda diaria es lineal en quantity * food_per_bird, así que SQL la
+    # suma por (tipo, proceso, categoría) y sólo viajan unos cientos de filas
+    rows = db.session.execute(
+        select(UserBirds.food_type, UserBirds.food_process, UserBirds.category_id,
+               func.sum(UserBirds.quantity * func.coalesce(UserBirds.food_per_bird, 0)),
+               func.count())
+        .join(User, User.id == UserBirds.user_id)
+        .where(User.is_associated == True)
+        .group_by(UserBirds.food_type, UserBirds.food_process, UserBirds.category_id)
+    ).all()
+    category_names = dict(db.session.execute(select(BirdCategory.id, BirdCategory.name)).all())
+
+    food_type, process, category, daily, count = zip(*rows) if rows else ([],) * 5
+    return {
+        'daily': np.array(daily, dtype=np.float64),
+        'rows': np.array(count, dtype=np.int64),
+        'food_type': _encode(food_type),
+        'food_process': _encode(process),
+        'category': _encode([category_names.get(c) for c in category])
+    }
+
+
+def load_prices():
+    return dict(db.session.execute(
+        select(BirdFoodType.name, BirdFoodType.price_per_pound)
+    ).all())
+
+
+def _groups(codes, labels, demand, cost):
+    pounds = np.bincount(codes, weights=demand, minlength=len(labels))
+    money = np.bincount(codes, weights=cost, minlength=len(labels))
+    return [
+        {'name': label, 'pounds': round(float(p), 2), 'cost': round(float(c), 2)}
+        for label, p, c in sorted(zip(labels, pounds, money), key=lambda g: -g[1])
+    ]
+
+
+def compute_forecast(columns, prices, days):
+    # Demanda (lb) y coste por tipo de comida, proceso y categoría en `days` días.
+    # Acepta tanto filas individuales como grupos ya sumados por SQL.
+    demand = columns['daily'] * days
+
+    type_codes, type_labels = columns['food_type']
+    price_table = np.array([prices.get(label, 0.0) for label in type_labels], dtype=np.float64)
+    cost = demand * price_table[type_codes] if len(type_labels) else demand * 0
+
+    process_codes, process_labels = columns['food_process']
+    # Combinación tipo x proceso en un solo bincount
+    pair_codes = type_codes * len(process_labels) + process_codes
+    pair_labels = [f'{t} / {p}' for t in type_labels for p in process_labels]
+
+    return {
+        'days': days,
+        'rows': int(columns['rows'].sum()),
+        'total': {'pounds': round(float(demand.sum()), 2), 'cost': round(float(cost.sum()), 2)},
+        'missing_prices': [label for label in type_labels if label not in prices],
+        'by_food_type': _groups(type_codes, type_labels, demand, cost),
+        'by_process': _groups(process_codes, process_labels, demand, cost),
+        'by_food_type_process': [
+            group for group in _groups(pair_codes, pair_labels, demand, cost) if group['pounds']
+        ],
+        'by_category': _groups(*columns['category'], demand, cost)
+    }
+
+
+def club_forecast(horizons=HORIZONS):
+    # Las columnas se reutilizan mientras no cambie la versión de datos (sube
+    # con cualquier escritura sobre aves o usuarios); el TTL solo libera memoria
+    columns = reference_cache.get_or_set(('forecast_columns', data_version()), load_columns)
+    prices = load_prices()
+    return [compute_forecast(columns, prices, days) for days in horizons]
@@ -0,0 +1,20 @@
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5001)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+accesslog = os.environ.get('GUNICORN_ACCESSLOG')
+
+# La app se crea una sola vez en el proceso maestro y los workers la heredan
+# al hacer fork
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Las conexiones abiertas por el maestro no se comparten entre procesos
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,125 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, insert, func, literal
+
+from models import db, UserBirds, BirdCategory, InventoryEvent, InventoryDaily, upsert
+
+
+def _bump_daily(rows):
+    stmt = upsert(InventoryDaily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'day'],
+        set_={
+            'quantity_delta': InventoryDaily.quantity_delta + stmt.excluded.quantity_delta,
+            'food_delta': InventoryDaily.food_delta + stmt.excluded.food_delta,
+            'events': InventoryDaily.events + stmt.excluded.events
+        }
+    )
+    db.session.execute(stmt, rows)
+
+
+def record(events, source):
+    # events: dicts con user_id, category_id, quantity, quantity_delta,
+    # food_required y food_delta. Se omiten los que no cambian nada.
+    events = [e for e in events if e['quantity_delta'] or e['food_delta']]
+    if not events:
+        return
+
+    now = datetime.utcnow()
+    db.session.execute(insert(InventoryEvent), [
+        dict(event, ts=now, source=source) for event in events
+    ])
+
+    daily = defaultdict(lambda: [0, 0.0, 0])
+    for event in events:
+        bucket = daily[event['user_id']]
+        bucket[0] += event['quantity_delta']
+        bucket[1] += event['food_delta']
+        bucket[2] += 1
+    _bump_daily([
+        {'user_id': user_id, 'day': now.date(), 'quantity_delta': dq,
+         'food_delta': round(df, 2), 'events': count}
+        for user_id, (dq, df, count) in daily.items()
+    ])
+
+
+def record_food_update(conditions, food_per_bird, source):
+    # Versión en SQL para actualizaciones masivas: registra el cambio de
+    # comida de todas las filas que cumplen `conditions` antes del UPDATE
+    now = datetime.utcnow()
+    new_food = func.round(UserBirds.quantity * food_per_bird, 2)
+    food_delta = new_food - UserBirds.food_required
+    db.session.execute(
+        insert(InventoryEvent).from_select(
+            ['user_id', 'category_id', 'ts', 'quantity', 'quantity_delta',
+             'food_required', 'food_delta', 'source'],
+            select(UserBirds.user_id, UserBirds.category_id, literal(now, db.DateTime),
+                   UserBirds.quantity, literal(0), new_food, food_delta, literal(source))
+            .where(*conditions, food_delta != 0)
+        )
+    )
+    rows = db.session.execute(
+        select(UserBirds.user_id, func.sum(food_delta), func.count())
+        .where(*conditions, food_delta != 0)
+        .group_by(UserBirds.user_id)
+    ).all()
+    if rows:
+        _bump_daily([
+            {'user_id': user_id, 'day': now.date(), 'quantity_delta': 0,
+             'food_delta': round(df, 2), 'events': count}
+            for user_id, df, count in rows
+        ])
+
+
+def changes_since(user_ids, since):
+    # {user_id: (delta_cantidad, delta_comida)} desde `since` (fecha incluida)
+    if not user_ids:
+        return {}
+    rows = db.session.execute(
+        select(InventoryDaily.user_id,
+               func.sum(InventoryDaily.quantity_delta),
+               func.sum(InventoryDaily.food_delta))
+        .where(InventoryDaily.user_id.in_(user_ids), InventoryDaily.day >= since)
+        .group_by(InventoryDaily.user_id)
+    ).all()
+    return {user_id: (dq or 0, round(df or 0.0, 2)) for user_id, dq, df in rows}
+
+
+def weekly_changes(user_ids):
+    return changes_since(user_ids, (datetime.utcnow() - timedelta(days=7)).date())
+
+
+def daily_trend(user_id=None, days=90):
+    # Serie diaria de cambios netos de un usuario (o de todo el club)
+    since = (datetime.utcnow() - timedelta(days=days)).date()
+    stmt = (
+        select(InventoryDaily.day,
+               func.sum(InventoryDaily.quantity_delta),
+               func.sum(InventoryDaily.food_delta),
+               func.sum(InventoryDaily.events))
+        .where(InventoryDaily.day >= since)
+        .group_by(InventoryDaily.day)
+        .order_by(InventoryDaily.day)
+    )
+    if user_id is not None:
+        stmt = stmt.where(InventoryDaily.user_id == user_id)
+    return [
+        {'day': day.isoformat(), 'quantity_delta': dq, 'food_delta': round(df, 2), 'events': count}
+        for day, dq, df, count in db.session.execute(stmt)
+    ]
+
+
+def recent_events(user_id, limit=20):
+    return db.session.execute(
+        select(InventoryEvent, BirdCategory.name.label('category_name'))
+        .join(BirdCategory, BirdCategory.id == InventoryEvent.category_id)
+        .where(InventoryEvent.user_id == user_id)
+        .order_by(InventoryEvent.ts.desc(), InventoryEvent.id.desc())
+        .limit(limit)
+    ).all()
+
+
+def remove_user(user_id):
+    db.session.execute(delete(InventoryEvent).where(InventoryEvent.user_id == user_id))
+    db.session.execute(delete(InventoryDaily).where(InventoryDaily.user_id == user_id))
@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Las imágenes se guardan por hash de contenido ('<sha256>.<ext>'): dos subidas
+# iguales comparten archivo y una URL nunca cambia de contenido, así que las
+# miniaturas se pueden cachear sin límite en el navegador.
+NAME_RE = re.compile(r'^[0-9a-f]{64}\.(jpg|png|gif|webp)$')
+CHUNK_SIZE = 64 * 1024
+
+_executor = None
+_pending = set()
+_lock = Lock()
+
+
+def image_format(head):
+    # Se reconoce el formato por la firma; la imagen solo se decodifica en los
+    # hilos de miniaturas
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def upload_folder():
+    return os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
+
+
+def original_path(folder, name):
+    return os.path.join(folder, name[:2], name)
+
+
+def thumbnail_path(folder, name, size):
+    # Por tamaño en píxeles: cambiar THUMBNAIL_SIZES genera miniaturas nuevas
+    return os.path.join(folder, 'thumbs', str(size), name[:2], name.rsplit('.', 1)[0] + '.jpg')
+
+
+def save_upload(stream):
+    # Copia el archivo por bloques mientras calcula el hash; si ese contenido
+    # ya existe se descarta la copia. Devuelve el nombre o None si no es una
+    # imagen admitida.
+    head = stream.read(CHUNK_SIZE)
+    extension = image_format(head)
+    if extension is None:
+        return None
+
+    folder = upload_folder()
+    os.makedirs(folder, exist_ok=True)
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=folder, prefix='.upload-', delete=False) as tmp:
+        try:
+            chunk = head
+            while chunk:
+                digest.update(chunk)
+                tmp.write(chunk)
+                chunk = stream.read(CHUNK_SIZE)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+
+    name = f'{digest.hexdigest()}.{extension}'
+    path = original_path(folder, name)
+    if os.path.exists(path):
+        os.remove(tmp.name)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp.name, path)
+    schedule_thumbnails(name)
+    return name
+
+
+def make_thumbnails(folder, name, sizes):
+    # Miniaturas cuadradas en JPEG; se escriben a un temporal y se renombran
+    # para que nunca se sirva un archivo a medio escribir
+    from PIL import Image, ImageOps
+
+    with Image.open(original_path(folder, name)) as image:
+        # En JPEG decodifica directamente a una escala reducida
+        image.draft('RGB', (max(sizes) * 2, max(sizes) * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+
+        for size in sizes:
+            path = thumbnail_path(folder, name, size)
+            if os.path.exists(path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.jpg', delete=False) as tmp:
+                thumbnail.save(tmp, 'JPEG', quality=85, optimize=True)
+            os.replace(tmp.name, path)
+
+
+def _executor_for(app):
+    # Pool por proceso, creado en el primer uso (después del fork de gunicorn)
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=app.config['IMAGE_WORKERS'],
+                                       thread_name_prefix='thumbnails')
+    return _executor
+
+
+def _finished(name, future):
+    with _lock:
+        _pending.discard(name)
+    if future.exception() is not None:
+        logger.error('No se pudieron generar las miniaturas de %s: %s', name, future.exception())
+
+
+def schedule_thumbnails(name):
+    # Encola la generación si falta alguna miniatura y no está ya en curso
+    folder = upload_folder()
+    sizes = tuple(sorted(set(current_app.config['THUMBNAIL_SIZES'].values())))
+    if all(os.path.exists(thumbnail_path(folder, name, size)) for size in sizes):
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+        future = _executor_for(current_app).submit(make_thumbnails, folder, name, sizes)
+    future.add_done_callback(lambda future: _finished(name, future))
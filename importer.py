@@ -0,0 +1,194 @@
+import csv
+from datetime import datetime
+
+from sqlalchemy import select, insert, update, bindparam, case, func
+
+from models import (db, User, UserBirds, Award, check_quantity,
+                    check_export_quantity, check_food_per_bird, check_award_date,
+                    position_rank)
+import cache
+import inventory
+import standings
+import contests
+
+CHUNK_SIZE = 5000
+MAX_ERRORS = 100  # Errores que se reportan; el resto sólo se cuentan
+
+# Columnas opcionales: vacías o ausentes en el archivo conservan el valor guardado
+KEEP_COLUMNS = ['food_per_bird', 'food_type', 'food_process', 'notes']
+
+
+def _new(column):
+    return bindparam(f'n_{column}', type_=UserBirds.__table__.c[column].type)
+
+
+# Actualización por id que además sube la versión de la fila (ver UserBirds.version).
+# Sin exportación en el archivo se conserva la guardada, acotada a la nueva cantidad
+UPDATE_BIRD = (
+    update(UserBirds)
+    .where(UserBirds.id == bindparam('b_id'))
+    .values(
+        version=UserBirds.version + 1,
+        quantity=_new('quantity'),
+        export_quantity=case(
+            (_new('export_quantity').is_not(None), _new('export_quantity')),
+            (UserBirds.export_quantity > _new('quantity'), _new('quantity')),
+            else_=UserBirds.export_quantity
+        ),
+        **{column: func.coalesce(_new(column), getattr(UserBirds, column)) for column in KEEP_COLUMNS}
+    )
+    .execution_options(dml_strategy='core_only', synchronize_session=False)
+)
+
+BIRD_COLUMNS = ['username', 'category', 'quantity', 'export_quantity',
+                'food_per_bird', 'food_type', 'food_process', 'notes']
+AWARD_COLUMNS = ['username', 'contest_name', 'award_date', 'position',
+                 'category', 'description']
+
+
+class ImportResult:
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(f'Línea {line}: {message}')
+
+
+def _text(row, key):
+    value = (row.get(key) or '').strip()
+    return value or None
+
+
+def _reader(stream, required):
+    reader = csv.DictReader(stream)
+    missing = [column for column in required if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Faltan columnas: {', '.join(missing)}")
+    return reader
+
+
+def _usernames():
+    return dict(db.session.execute(select(User.username, User.id)).all())
+
+
+def _flush(statement, rows):
+    if rows:
+        db.session.execute(statement, rows)
+        db.session.commit()
+        rows.clear()
+
+
+def import_birds(stream, chunk_size=CHUNK_SIZE):
+    # Crea o actualiza UserBirds por (usuario, categoría) en lotes
+    result = ImportResult()
+    reader = _reader(stream, ['username', 'category', 'quantity'])
+    users = _usernames()
+    categories = {c.name: c.id for c in cache.categories()}
+    existing = {
+        (user_id, category_id): bird_id for bird_id, user_id, category_id in
+        db.session.execute(select(UserBirds.id, UserBirds.user_id, UserBirds.category_id))
+    }
+    seen = set()
+    now = datetime.utcnow()
+    inserts, updates = [], []
+
+    for line, row in enumerate(reader, 2):
+        try:
+            user_id = users.get(_text(row, 'username'))
+            assert user_id, f"Usuario '{row.get('username')}' no existe"
+            category_id = categories.get(_text(row, 'category'))
+            assert category_id, f"Categoría '{row.get('category')}' no existe"
+            key = (user_id, category_id)
+            assert key not in seen, "Usuario y categoría repetidos en el archivo"
+
+            quantity = check_quantity(int(row['quantity']))
+            export_quantity = _text(row, 'export_quantity')
+            export_quantity = check_export_quantity(int(export_quantity) if export_quantity else None, quantity)
+            food_per_bird = _text(row, 'food_per_bird')
+            food_per_bird = check_food_per_bird(float(food_per_bird) if food_per_bird else None)
+        except (AssertionError, ValueError, TypeError) as e:
+            result.reject(line, str(e))
+            continue
+
+        seen.add(key)
+        optional = {
+            'export_quantity': export_quantity,
+            'food_per_bird': food_per_bird,
+            'food_type': _text(row, 'food_type'),
+            'food_process': _text(row, 'food_process'),
+            'notes': _text(row, 'notes')
+        }
+        if key in existing:
+            # None = la columna no viene o está vacía: UPDATE_BIRD conserva el valor
+            updates.append({'b_id': existing[key], 'n_quantity': quantity, 'last_updated': now,
+                            **{f'n_{column}': value for column, value in optional.items()}})
+        else:
+            inserts.append({'user_id': user_id, 'category_id': category_id, 'quantity': quantity,
+                            'last_updated': now, **optional,
+                            'export_quantity': export_quantity or 0})
+
+        if len(inserts) >= chunk_size:
+            result.inserted += len(inserts)
+            _flush(insert(UserBirds), inserts)
+        if len(updates) >= chunk_size:
+            result.updated += len(updates)
+            _flush(UPDATE_BIRD, updates)
+
+    result.inserted += len(inserts)
+    _flush(insert(UserBirds), inserts)
+    result.updated += len(updates)
+    _flush(UPDATE_BIRD, updates)
+
+    # Los totales precalculados se recalculan una vez al final
+    inventory.rebuild()
+    db.session.commit()
+    return result
+
+
+def import_awards(stream, chunk_size=CHUNK_SIZE):
+    result = ImportResult()
+    reader = _reader(stream, ['username', 'contest_name', 'award_date', 'position'])
+    users = _usernames()
+    awards = []
+
+    for line, row in enumerate(reader, 2):
+        try:
+            user_id = users.get(_text(row, 'username'))
+            assert user_id, f"Usuario '{row.get('username')}' no existe"
+            contest_name = _text(row, 'contest_name')
+            assert contest_name, "Nombre del concurso vacío"
+            award_date = _text(row, 'award_date')
+            award_date = check_award_date(
+                datetime.strptime(award_date, '%Y-%m-%d').date() if award_date else None
+            )
+            position = _text(row, 'position')
+            assert position, "Debe indicar el puesto del premio"
+        except (AssertionError, ValueError) as e:
+            result.reject(line, str(e))
+            continue
+
+        awards.append({
+            'user_id': user_id,
+            'contest_name': contest_name,
+            'award_date': award_date,
+            'position': position,
+            'position_rank': position_rank(position),
+            'category': _text(row, 'category') or '',
+            'description': _text(row, 'description')
+        })
+        if len(awards) >= chunk_size:
+            result.inserted += len(awards)
+            standings.apply(awards)
+            contests.record(award['contest_name'] for award in awards)
+            _flush(insert(Award), awards)
+
+    result.inserted += len(awards)
+    standings.apply(awards)
+    contests.record(award['contest_name'] for award in awards)
+    _flush(insert(Award), awards)
+    return result
@@ -0,0 +1,266 @@
+from datetime import datetime
+
+from sqlalchemy import select, update, delete, func, bindparam
+from sqlalchemy.orm import aliased
+from models import (db, User, UserBirds, BirdCategory, CategoryInventory, UserInventory, upsert,
+                    check_quantity, check_export_quantity, ConflictError)
+import history
+
+
+def _bump(model, key, rows):
+    # Suma los deltas a las filas existentes o las crea si no existen
+    stmt = upsert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={name: getattr(model, name) + getattr(stmt.excluded, name) for name in rows[0] if name != key}
+    )
+    db.session.execute(stmt, rows)
+
+
+def apply_food_deltas(food):
+    # food: {category_id: delta de lb/día} de aves de asociados
+    rows = [{'category_id': cid, 'total_quantity': 0, 'total_export': 0, 'total_food': delta}
+            for cid, delta in food.items() if delta]
+    if rows:
+        _bump(CategoryInventory, 'category_id', rows)
+
+
+def apply_user_deltas(user, deltas, food=None):
+    # deltas: {category_id: (delta_cantidad, delta_exportacion)}; food: {category_id: delta lb/día}
+    food = food or {}
+    deltas = {cid: d for cid, d in deltas.items() if d != (0, 0)}
+    if not deltas:
+        return
+
+    _bump(UserInventory, 'user_id', [{
+        'user_id': user.id,
+        'total_quantity': sum(d[0] for d in deltas.values()),
+        'total_export': sum(d[1] for d in deltas.values())
+    }])
+
+    if user.is_associated:
+        _bump(CategoryInventory, 'category_id', [
+            {'category_id': cid, 'total_quantity': dq, 'total_export': de, 'total_food': food.get(cid, 0.0)}
+            for cid, (dq, de) in deltas.items()
+        ])
+
+
+def _execute_rows(stmt, rows):
+    # Filas afectadas en total; si el driver no informa el conteo de un
+    # executemany se ejecuta fila por fila
+    if db.session.get_bind().dialect.supports_sane_multi_rowcount:
+        return db.session.execute(stmt, rows).rowcount
+    return sum(db.session.execute(stmt, row).rowcount for row in rows)
+
+
+def save_user_birds(user, submitted, source='profile', versions=None):
+    # submitted: {category_id: (cantidad, exportación)} tal como llega del formulario.
+    # versions: {category_id: versión de la fila que mostraba el formulario (0 si
+    # no existía)}. Solo se escriben las filas que cambian y cada escritura exige
+    # la versión esperada; si otro las modificó se lanza ConflictError (quien
+    # llama hace rollback) en lugar de pisar sus datos.
+    stored = {
+        category_id: (quantity or 0, export_quantity or 0, food_per_bird or 0, version)
+        for category_id, quantity, export_quantity, food_per_bird, version in db.session.execute(
+            select(UserBirds.category_id, UserBirds.quantity, UserBirds.export_quantity,
+                   UserBirds.food_per_bird, UserBirds.version)
+            .where(UserBirds.user_id == user.id)
+        )
+    }
+
+    now = datetime.utcnow()
+    inserts, updates, removed, deltas, food, events = [], [], [], {}, {}, []
+    for category_id, (quantity, export_quantity) in submitted.items():
+        old_quantity, old_export, food_per_bird, version = stored.get(category_id, (0, 0, 0, 0))
+        if quantity > 0:
+            if (quantity, export_quantity) == (old_quantity, old_export):
+                continue
+            check_quantity(quantity)
+            check_export_quantity(export_quantity, quantity)
+            row = {'b_user_id': user.id, 'b_category_id': category_id, 'b_version': version,
+                   'quantity': quantity, 'export_quantity': export_quantity, 'last_updated': now}
+            (updates if category_id in stored else inserts).append(row)
+            deltas[category_id] = (quantity - old_quantity, export_quantity - old_export)
+        elif category_id in stored:
+            check_quantity(quantity)
+            removed.append({'b_user_id': user.id, 'b_category_id': category_id, 'b_version': version})
+            deltas[category_id] = (-old_quantity, -old_export)
+            quantity = 0
+        else:
+            continue
+
+        new_food = round(quantity * food_per_bird, 2)
+        food[category_id] = round(new_food - round(old_quantity * food_per_bird, 2), 2)
+        events.append({
+            'user_id': user.id,
+            'category_id': category_id,
+            'quantity': quantity,
+            'quantity_delta': quantity - old_quantity,
+            'food_required': new_food,
+            'food_delta': food[category_id]
+        })
+
+    # Filas que cambiaron desde que se generó el formulario
+    if versions is not None:
+        stale = [cid for cid in deltas if versions.get(cid, 0) != stored.get(cid, (0, 0, 0, 0))[3]]
+        if stale:
+            raise ConflictError(stale)
+
+    # Sentencias del ORM (suben la versión de datos de los reportes) ejecutadas
+    # como executemany de Core, que informa las filas afectadas
+    core = {'dml_strategy': 'core_only', 'synchronize_session': False}
+    match = (UserBirds.user_id == bindparam('b_user_id'), UserBirds.category_id == bindparam('b_category_id'))
+    if inserts:
+        # Una fila creada por otro entre la lectura y la escritura es un conflicto
+        stmt = (
+            upsert(UserBirds)
+            .on_conflict_do_nothing(index_elements=['user_id', 'category_id'])
+            .execution_options(dml_strategy='raw')
+        )
+        rows = [{'user_id': row['b_user_id'], 'category_id': row['b_category_id'], 'version': 1,
+                 'quantity': row['quantity'], 'export_quantity': row['export_quantity'],
+                 'last_updated': row['last_updated']} for row in inserts]
+        if _execute_rows(stmt, rows) != len(rows):
+            raise ConflictError([row['b_category_id'] for row in inserts])
+    if updates:
+        stmt = (
+            update(UserBirds)
+            .where(*match, UserBirds.version == bindparam('b_version'))
+            .values(version=UserBirds.version + 1)
+            .execution_options(**core)
+        )
+        if _execute_rows(stmt, updates) != len(updates):
+            raise ConflictError([row['b_category_id'] for row in updates])
+    if removed:
+        stmt = (
+            delete(UserBirds)
+            .where(*match, UserBirds.version == bindparam('b_version'))
+            .execution_options(**core)
+        )
+        if _execute_rows(stmt, removed) != len(removed):
+            raise ConflictError([row['b_category_id'] for row in removed])
+
+    apply_user_deltas(user, deltas, food)
+    history.record(events, source)
+    return deltas
+
+
+def _user_category_totals(user_id):
+    return db.session.execute(
+        select(UserBirds.category_id,
+               func.coalesce(func.sum(UserBirds.quantity), 0),
+               func.coalesce(func.sum(UserBirds.export_quantity), 0),
+               func.coalesce(func.sum(UserBirds.food_required), 0.0))
+        .where(UserBirds.user_id == user_id)
+        .group_by(UserBirds.category_id)
+    ).all()
+
+
+def set_associated(user, associated):
+    # Suma o resta las aves del usuario en los totales por categoría
+    sign = 1 if associated else -1
+    rows = [
+        {'category_id': cid, 'total_quantity': sign * qty, 'total_export': sign * exp,
+         'total_food': sign * food}
+        for cid, qty, exp, food in _user_category_totals(user.id)
+    ]
+    if rows:
+        _bump(CategoryInventory, 'category_id', rows)
+
+
+def remove_user(user):
+    if user.is_associated:
+        set_associated(user, False)
+    db.session.execute(delete(UserInventory).where(UserInventory.user_id == user.id))
+
+
+def rebuild():
+    # Recalcula todas las tablas de totales a partir de UserBirds
+    db.session.execute(delete(CategoryInventory))
+    db.session.execute(delete(UserInventory))
+
+    db.session.execute(
+        CategoryInventory.__table__.insert().from_select(
+            ['category_id', 'total_quantity', 'total_export', 'total_food'],
+            select(UserBirds.category_id,
+                   func.coalesce(func.sum(UserBirds.quantity), 0),
+                   func.coalesce(func.sum(UserBirds.export_quantity), 0),
+                   func.coalesce(func.sum(UserBirds.food_required), 0.0))
+            .join(User)
+            .where(User.is_associated == True)
+            .group_by(UserBirds.category_id)
+        )
+    )
+    db.session.execute(
+        UserInventory.__table__.insert().from_select(
+            ['user_id', 'total_quantity', 'total_export'],
+            select(UserBirds.user_id,
+                   func.coalesce(func.sum(UserBirds.quantity), 0),
+                   func.coalesce(func.sum(UserBirds.export_quantity), 0))
+            .group_by(UserBirds.user_id)
+        )
+    )
+
+
+def ensure_rollups():
+    # Rellena las tablas de totales la primera vez (bases existentes) o si
+    # falta el alimento por categoría (columna agregada después)
+    missing = db.session.execute(select(UserInventory.user_id).limit(1)).first() is None \
+        or db.session.execute(select(CategoryInventory.category_id)
+                              .where(CategoryInventory.total_food.is_(None)).limit(1)).first() is not None
+    if missing and db.session.execute(select(UserBirds.id).limit(1)).first() is not None:
+        rebuild()
+        db.session.commit()
+
+
+def subtree_totals(root_id=None):
+    # Totales de cantidad, exportación y alimento (lb/día) de cada categoría
+    # sumando todo su subárbol, a cualquier profundidad, en una sola consulta
+    # sobre los totales precalculados: cada categoría suma las filas de
+    # CategoryInventory de las rutas dentro de la suya (rango sobre el índice
+    # de path). El costo depende de categorías y profundidad, no de las aves.
+    descendant = aliased(BirdCategory)
+    query = (
+        select(BirdCategory.id, BirdCategory.name, BirdCategory.parent_id, BirdCategory.path,
+               BirdCategory.depth.label('depth'),
+               func.sum(CategoryInventory.total_quantity).label('total_quantity'),
+               func.sum(CategoryInventory.total_export).label('total_export'),
+               func.round(func.coalesce(func.sum(CategoryInventory.total_food), 0.0), 2).label('total_food'))
+        .join(descendant, descendant.path.between(BirdCategory.path, BirdCategory.path + '~'))
+        .join(CategoryInventory, CategoryInventory.category_id == descendant.id)
+        .group_by(BirdCategory.id)
+        .having(func.sum(CategoryInventory.total_quantity) > 0)
+        .order_by(BirdCategory.path)
+    )
+    if root_id is not None:
+        root_path = select(BirdCategory.path).where(BirdCategory.id == root_id).scalar_subquery()
+        query = query.where(BirdCategory.subtree(root_path))
+    return db.session.execute(query).all()
+
+
+def ensure_category_paths():
+    # Enlaza por nombre las categorías con solo parent_category y calcula la
+    # ruta de las que no la tienen (bases anteriores a la jerarquía)
+    if db.session.execute(select(BirdCategory.id).where(BirdCategory.path.is_(None)).limit(1)).first() is None:
+        return
+    rows = db.session.execute(select(BirdCategory.id, BirdCategory.name, BirdCategory.parent_id,
+                                     BirdCategory.parent_category)).all()
+    ids = {row.name: row.id for row in rows}
+    parents = {row.id: row.parent_id or ids.get(row.parent_category) for row in rows}
+
+    paths = {}
+
+    def path_of(category_id, seen=()):
+        if category_id not in paths:
+            parent_id = parents[category_id]
+            # Un ciclo en los datos deja la categoría como raíz
+            if parent_id is None or parent_id in seen or parent_id not in parents:
+                paths[category_id] = f'/{category_id}/'
+            else:
+                paths[category_id] = f'{path_of(parent_id, seen + (category_id,))}{category_id}/'
+        return paths[category_id]
+
+    db.session.execute(update(BirdCategory), [
+        {'id': row.id, 'parent_id': parents[row.id], 'path': path_of(row.id)} for row in rows
+    ])
+    db.session.commit()
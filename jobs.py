@@ -0,0 +1,191 @@
+import logging
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app, render_template
+from markupsafe import Markup
+from sqlalchemy import select, update, delete, func
+
+from models import db, ReportJob
+import exports
+
+logger = logging.getLogger(__name__)
+
+# Cola de reportes en la propia base (sin broker): la web solo inserta una
+# fila y un proceso aparte (`flask jobs-worker`) los genera a disco, así los
+# reportes grandes no ocupan workers de gunicorn.
+Report = namedtuple('Report', 'label formats build')
+ACTIVE = ('queued', 'running')
+
+
+def _html(render):
+    # Página imprimible completa, igual a la que sirve la ruta del reporte
+    def build(fmt, path):
+        with current_app.test_request_context():
+            html = render()
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(html)
+    return build
+
+
+def _export(rows, html=None):
+    def build(fmt, path):
+        if fmt == 'html':
+            html(fmt, path)
+        else:
+            exports.write_export(rows, fmt, path)
+    return build
+
+
+def _associates_page():
+    from blueprints.reports import associates_report_context
+    body = Markup(render_template('admin/_associates_body.html', **associates_report_context()))
+    return render_template('admin/associates_report.html', body=body)
+
+
+def _contact_page():
+    from blueprints.reports import contact_report_body
+    return render_template('reports/contact_report.html', body=Markup(contact_report_body()),
+                           now=datetime.utcnow())
+
+
+def _awards_page():
+    from blueprints.reports import awards_report_body
+    return render_template('reports/awards_report.html', body=Markup(awards_report_body()),
+                           now=datetime.utcnow())
+
+
+REPORTS = {
+    'associates': Report('Reporte de asociados', ('html',), _html(_associates_page)),
+    'contact': Report('Contactos', ('html', 'csv', 'xlsx'),
+                      _export(exports.contact_rows, _html(_contact_page))),
+    'awards': Report('Premios', ('html', 'csv', 'xlsx'),
+                     _export(exports.awards_rows, _html(_awards_page))),
+    'birds': Report('Aves por asociado', ('csv', 'xlsx'), _export(exports.birds_rows)),
+}
+
+
+def job_folder():
+    return current_app.config['REPORT_JOB_FOLDER'] or os.path.join(current_app.instance_path, 'report_jobs')
+
+
+def result_path(job):
+    return os.path.join(job_folder(), job.filename)
+
+
+def enqueue(kind, fmt, user_id):
+    report = REPORTS.get(kind)
+    if report is None or fmt not in report.formats:
+        raise ValueError('Reporte o formato no válido')
+    active = db.session.execute(
+        select(func.count()).select_from(ReportJob)
+        .where(ReportJob.requested_by == user_id, ReportJob.status.in_(ACTIVE))
+    ).scalar()
+    if active >= current_app.config['REPORT_JOB_USER_LIMIT']:
+        raise ValueError('Ya tienes demasiados reportes en preparación; espera a que terminen')
+    job = ReportJob(kind=kind, format=fmt, requested_by=user_id)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def claim():
+    # Toma el trabajo más antiguo de la cola en un solo UPDATE, solo si hay
+    # cupo en el límite global; seguro con varios procesos worker
+    running = select(func.count()).select_from(ReportJob).where(ReportJob.status == 'running')
+    oldest = select(ReportJob.id).where(ReportJob.status == 'queued').order_by(ReportJob.id).limit(1)
+    job_id = db.session.execute(
+        update(ReportJob)
+        .where(ReportJob.id == oldest.scalar_subquery(), ReportJob.status == 'queued',
+               running.scalar_subquery() < current_app.config['REPORT_JOB_CONCURRENCY'])
+        .values(status='running', started_at=datetime.utcnow())
+        .returning(ReportJob.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+    return job_id
+
+
+def run(job_id):
+    job = db.session.get(ReportJob, job_id)
+    folder = job_folder()
+    os.makedirs(folder, exist_ok=True)
+    filename = f'{job.id}_{job.kind}.{job.format}'
+    path = os.path.join(folder, filename)
+    partial = path + '.part'
+    try:
+        REPORTS[job.kind].build(job.format, partial)
+        os.replace(partial, path)
+    except Exception as error:
+        logger.exception('Falló el reporte %s (%s)', job.id, job.kind)
+        db.session.rollback()
+        if os.path.exists(partial):
+            os.remove(partial)
+        job.status, job.error = 'failed', str(error) or error.__class__.__name__
+    else:
+        job.status, job.filename, job.size = 'done', filename, os.path.getsize(path)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def requeue_stale():
+    # Trabajos de un worker que murió a mitad de camino
+    limit = datetime.utcnow() - timedelta(seconds=current_app.config['REPORT_JOB_TIMEOUT'])
+    count = db.session.execute(
+        update(ReportJob)
+        .where(ReportJob.status == 'running', ReportJob.started_at < limit)
+        .values(status='queued', started_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return count
+
+
+def purge():
+    # Borra los resultados vencidos y, si quedan más de REPORT_JOB_MAX_RESULTS,
+    # los más antiguos
+    config = current_app.config
+    expired = datetime.utcnow() - timedelta(seconds=config['REPORT_JOB_RETENTION'])
+    finished = select(ReportJob).where(ReportJob.status.in_(('done', 'failed')))
+    old = db.session.execute(finished.where(ReportJob.finished_at < expired)).scalars().all()
+    old += db.session.execute(
+        finished.where(ReportJob.finished_at >= expired)
+        .order_by(ReportJob.finished_at.desc()).offset(config['REPORT_JOB_MAX_RESULTS'])
+    ).scalars().all()
+    for job in old:
+        if job.filename and os.path.exists(result_path(job)):
+            os.remove(result_path(job))
+    if old:
+        db.session.execute(delete(ReportJob).where(ReportJob.id.in_([job.id for job in old])))
+        db.session.commit()
+    return len(old)
+
+
+def work(app, threads, poll=2.0, once=False):
+    # Bucle del proceso worker: reparte los trabajos en un pool de hilos, cada
+    # uno con su propio contexto de aplicación (y su propia sesión)
+    def run_in_context(job_id):
+        with app.app_context():
+            run(job_id)
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='reports') as pool:
+        running = set()
+        last_purge = 0
+        with app.app_context():
+            requeue_stale()
+        while True:
+            running = {future for future in running if not future.done()}
+            with app.app_context():
+                if time.monotonic() - last_purge > 60:
+                    purge()
+                    last_purge = time.monotonic()
+                job_id = claim() if len(running) < threads else None
+            if job_id is not None:
+                running.add(pool.submit(run_in_context, job_id))
+                continue
+            if once and not running:
+                return
+            time.sleep(poll)
@@ -0,0 +1,153 @@
+import logging
+import time
+from collections import defaultdict
+from threading import Lock
+
+from flask import g, request, has_request_context, abort, Response, before_render_template, template_rendered
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Límites de los buckets del histograma de latencia (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Metrics:
+    # Acumulados por endpoint en este worker (cada proceso de gunicorn tiene los suyos)
+    def __init__(self):
+        self._lock = Lock()
+        self.requests = defaultdict(int)        # (endpoint, method, status) -> peticiones
+        self.latency = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self.latency_sum = defaultdict(float)
+        self.sql_count = defaultdict(int)
+        self.sql_time = defaultdict(float)
+        self.template_time = defaultdict(float)
+        self.over_budget = defaultdict(int)
+
+    def observe(self, endpoint, method, status, total, sql_count, sql_time, template_time, over_budget):
+        with self._lock:
+            self.requests[(endpoint, method, status)] += 1
+            buckets = self.latency[endpoint]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+                    break
+            else:
+                buckets[-1] += 1
+            self.latency_sum[endpoint] += total
+            self.sql_count[endpoint] += sql_count
+            self.sql_time[endpoint] += sql_time
+            self.template_time[endpoint] += template_time
+            if over_budget:
+                self.over_budget[endpoint] += 1
+
+    def render(self):
+        # Formato de texto de Prometheus
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(f'{name}{{{labels}}} {value}' for labels, value in samples)
+
+        with self._lock:
+            family('aves_requests_total', 'counter', 'Peticiones atendidas',
+                   [(f'endpoint="{e}",method="{m}",status="{s}"', n)
+                    for (e, m, s), n in sorted(self.requests.items())])
+
+            lines.append('# HELP aves_request_duration_seconds Latencia total de la petición')
+            lines.append('# TYPE aves_request_duration_seconds histogram')
+            for endpoint, buckets in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+                    cumulative += count
+                    lines.append(f'aves_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                lines.append(f'aves_request_duration_seconds_sum{{endpoint="{endpoint}"}} {self.latency_sum[endpoint]:.6f}')
+                lines.append(f'aves_request_duration_seconds_count{{endpoint="{endpoint}"}} {cumulative}')
+
+            family('aves_sql_queries_total', 'counter', 'Sentencias SQL ejecutadas',
+                   [(f'endpoint="{e}"', n) for e, n in sorted(self.sql_count.items())])
+            family('aves_sql_duration_seconds_total', 'counter', 'Tiempo en la base de datos',
+                   [(f'endpoint="{e}"', f'{t:.6f}') for e, t in sorted(self.sql_time.items())])
+            family('aves_template_duration_seconds_total', 'counter', 'Tiempo renderizando plantillas',
+                   [(f'endpoint="{e}"', f'{t:.6f}') for e, t in sorted(self.template_time.items())])
+            family('aves_query_budget_exceeded_total', 'counter', 'Peticiones que superaron el presupuesto de consultas',
+                   [(f'endpoint="{e}"', n) for e, n in sorted(self.over_budget.items())])
+        return '\n'.join(lines) + '\n'
+
+
+def _current():
+    return g.get('metrics') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    current = _current()
+    if current is not None:
+        current['sql_count'] += 1
+        current['sql_time'] += elapsed
+
+
+def _before_render(app, template, context, **extra):
+    current = _current()
+    if current is not None:
+        current['template_start'].append(time.perf_counter())
+
+
+def _after_render(app, template, context, **extra):
+    current = _current()
+    if current is not None and current['template_start']:
+        elapsed = time.perf_counter() - current['template_start'].pop()
+        # Los render_template anidados ya cuentan dentro del exterior
+        if not current['template_start']:
+            current['template_time'] += elapsed
+
+
+def init_app(app):
+    # Solo se instala con METRICS_ENABLED; sin ella no hay ningún costo por petición
+    metrics = app.extensions['metrics'] = Metrics()
+    budget = app.config['QUERY_BUDGET']
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_timer():
+        g.metrics = {'start': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0,
+                     'template_time': 0.0, 'template_start': []}
+
+    @app.after_request
+    def record(response):
+        current = g.pop('metrics', None)
+        if current is None or request.endpoint == 'metrics':
+            return response
+        total = time.perf_counter() - current['start']
+        endpoint = request.endpoint or 'not_found'
+        over_budget = budget and current['sql_count'] > budget
+        if over_budget:
+            logger.warning('%s %s: %d consultas SQL (presupuesto %d)',
+                           request.method, request.path, current['sql_count'], budget)
+
+        metrics.observe(endpoint, request.method, response.status_code, total,
+                        current['sql_count'], current['sql_time'], current['template_time'], over_budget)
+        response.headers.add('Server-Timing', f'db;dur={current["sql_time"] * 1000:.1f};desc="{current["sql_count"]} consultas"')
+        response.headers.add('Server-Timing', f'tpl;dur={current["template_time"] * 1000:.1f}')
+        response.headers.add('Server-Timing', f'total;dur={total * 1000:.1f}')
+        return response
+
+    def metrics_view():
+        token = app.config['METRICS_TOKEN']
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(401)
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -1,12 +1,59 @@
+import re
+from functools import lru_cache
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
-from sqlalchemy.orm import validates
+from sqlalchemy import func, event, inspect, select, update, text
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import validates, Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.schema import CreateColumn
 from datetime import datetime
 
 
 db = SQLAlchemy()
 
+# Reglas de validación compartidas por los @validates y la importación masiva
+def check_award_date(award_date):
+    assert award_date is not None, "Fecha de premio no puede ser vacía"
+    return award_date
+
+def check_quantity(quantity):
+    assert quantity >= 0, "Cantidad no puede ser negativa"
+    return quantity
+
+def check_export_quantity(export_quantity, quantity):
+    if export_quantity is not None:
+        assert export_quantity <= quantity, "La cantidad de exportación no puede ser mayor que la cantidad total"
+        assert export_quantity >= 0, "La cantidad de exportación no puede ser negativa"
+    return export_quantity
+
+def check_food_per_bird(food_per_bird):
+    if food_per_bird is not None:
+        assert food_per_bird >= 0, "Cantidad de alimento no puede ser negativa"
+    return food_per_bird
+
+class ConflictError(Exception):
+    # Otro usuario modificó las filas desde que se leyeron (bloqueo optimista)
+    def __init__(self, category_ids=()):
+        super().__init__('Otro usuario modificó estos datos mientras los editabas; revisa los valores actuales y vuelve a guardar')
+        self.category_ids = list(category_ids)
+
+# Puesto normalizado a entero: 0 = Gran Premio, 1 = primer lugar, etc.
+# Menciones y textos no reconocidos quedan sin puesto (None)
+POSITION_WORDS = {'gran premio': 0, 'primer': 1, 'segundo': 2, 'tercer': 3, 'cuarto': 4, 'quinto': 5}
+
+def position_rank(position):
+    text = (position or '').strip().lower()
+    match = re.match(r'(\d+)', text)
+    if match:
+        return int(match.group(1))
+    for word, rank in POSITION_WORDS.items():
+        if text.startswith(word):
+            return rank
+    return None
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
@@ -20,17 +67,25 @@ class User(UserMixin, db.Model):
     last_login = db.Column(db.DateTime)  # Fecha del último inicio de sesión
     is_active = db.Column(db.Boolean, default=True)  # Para manejar cuentas activas/inactivas
     address = db.Column(db.String(200))  # Nuevo campo para dirección
+    # Versión de la fila: el UPDATE del ORM exige que no haya cambiado desde
+    # que se leyó (StaleDataError si otro la modificó antes)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
     
     # Relaciones
     birds = db.relationship('UserBirds', backref='user', lazy=True, cascade='all, delete-orphan')
     awards = db.relationship('Award', backref='user', lazy=True, cascade='all, delete-orphan')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=password_hash_method())
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def password_needs_rehash(self):
+        # El hash guarda método y parámetros antes del primer '$'
+        return self.password_hash.split('$', 1)[0] != hash_parameters(password_hash_method())
+
     @validates('email')
     def validate_email(self, key, email):
         assert '@' in email, "Email debe contener @"
@@ -46,19 +101,98 @@ class User(UserMixin, db.Model):
         assert role in ['admin', 'specialist', 'dependiente', 'user'], "Rol no válido"
         return role
 
+def password_hash_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+
+
+@lru_cache(maxsize=8)
+def hash_parameters(method):
+    # Parámetros completos ('scrypt:32768:8:1', 'pbkdf2:sha256:600000'...) tal
+    # como werkzeug los escribe; se calculan una vez por método
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
 class BirdCategory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
-    parent_category = db.Column(db.String(100))  # Para jerarquías 
+    parent_category = db.Column(db.String(100))  # Nombre de la categoría padre (se muestra)
+    parent_id = db.Column(db.Integer, db.ForeignKey('bird_category.id'), index=True)
+    # Ruta materializada de ids ('/5/6/'): el subárbol de una categoría es el
+    # rango de rutas que empiezan por la suya, resoluble con el índice
+    path = db.Column(db.String(255), index=True)
     resource_needs = db.Column(db.Text)
     description = db.Column(db.Text)  # Descripción más detallada
     birds = db.relationship('UserBirds', backref='category', lazy=True)
+    parent = db.relationship('BirdCategory', remote_side=[id], backref='children')
 
     @validates('name')
     def validate_name(self, key, name):
         assert len(name) >= 3, "Nombre de categoría debe tener al menos 3 caracteres"
         return name
 
+    @hybrid_property
+    def depth(self):
+        return self.path.count('/') - 2 if self.path else 0
+
+    @depth.expression
+    def depth(cls):
+        # Misma cuenta de '/' en SQL para seleccionarla en consultas de totales
+        return func.coalesce(func.length(cls.path) - func.length(func.replace(cls.path, '/', '')) - 2, 0)
+
+    @staticmethod
+    def subtree(path):
+        # Condición "la ruta está dentro del subárbol de `path`" ('~' ordena después de dígitos y '/')
+        return BirdCategory.path.between(path, path + '~')
+
+
+@event.listens_for(BirdCategory, 'before_insert')
+def _category_parent(mapper, connection, target):
+    # Las categorías creadas solo con el nombre del padre se enlazan por nombre
+    if target.parent is not None:
+        target.parent_category = target.parent.name
+    elif target.parent_id is None and target.parent_category:
+        table = BirdCategory.__table__
+        target.parent_id = connection.execute(
+            select(table.c.id).where(table.c.name == target.parent_category)
+        ).scalar()
+
+
+@event.listens_for(BirdCategory, 'before_update')
+def _category_parent_name(mapper, connection, target):
+    if inspect(target).attrs.parent_id.history.has_changes():
+        table = BirdCategory.__table__
+        target.parent_category = connection.execute(
+            select(table.c.name).where(table.c.id == target.parent_id)
+        ).scalar() if target.parent_id else None
+
+
+@event.listens_for(BirdCategory, 'after_insert')
+def _category_path(mapper, connection, target):
+    # La ruta incluye el id propio, que recién se conoce tras el INSERT
+    table = BirdCategory.__table__
+    parent_path = connection.execute(
+        select(table.c.path).where(table.c.id == target.parent_id)
+    ).scalar() if target.parent_id else None
+    path = f'{parent_path or "/"}{target.id}/'
+    connection.execute(update(table).where(table.c.id == target.id).values(path=path))
+    set_committed_value(target, 'path', path)
+
+
+@event.listens_for(BirdCategory, 'after_update')
+def _category_moved(mapper, connection, target):
+    # Al cambiar de padre se reescribe la ruta de todo el subárbol
+    if not inspect(target).attrs.parent_id.history.has_changes() or not target.path:
+        return
+    table = BirdCategory.__table__
+    parent_path = connection.execute(
+        select(table.c.path).where(table.c.id == target.parent_id)
+    ).scalar() if target.parent_id else None
+    old_path, new_path = target.path, f'{parent_path or "/"}{target.id}/'
+    connection.execute(
+        update(table).where(table.c.path.between(old_path, old_path + '~'))
+        .values(path=new_path + func.substr(table.c.path, len(old_path) + 1))
+    )
+    set_committed_value(target, 'path', new_path)
+
 class Award(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -67,11 +201,23 @@ class Award(db.Model):
     description = db.Column(db.Text)
     category = db.Column(db.String(100))  # Categoría en la que se ganó el premio
     position = db.Column(db.String)  # Posición obtenida (1ro, 2do, etc.)
+    position_rank = db.Column(db.Integer)  # position normalizada (ver position_rank())
+
+    # Índices compuestos para los filtros de /admin/users (cubren user_id)
+    __table_args__ = (
+        db.Index('ix_award_date_user', 'award_date', 'user_id'),
+        db.Index('ix_award_position_user', 'position', 'user_id'),
+        db.Index('ix_award_user_date', 'user_id', 'award_date'),
+    )
 
     @validates('award_date')
     def validate_award_date(self, key, award_date):
-        assert award_date is not None, "Fecha de premio no puede ser vacía"
-        return award_date
+        return check_award_date(award_date)
+
+    @validates('position')
+    def validate_position(self, key, position):
+        self.position_rank = position_rank(position)
+        return position
 
 class UserBirds(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -84,29 +230,36 @@ class UserBirds(db.Model):
     notes = db.Column(db.Text)  # Notas adicionales sobre las aves
     export_quantity = db.Column(db.Integer, default=0)  # Cantidad para exportación
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Versión de la fila (ver User.version); las escrituras en lote la suben a mano
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Un registro por usuario y categoría (permite INSERT ... ON CONFLICT)
+    __table_args__ = (
+        db.Index('uq_user_birds_user_category', 'user_id', 'category_id', unique=True),
+    )
+    __mapper_args__ = {'version_id_col': version}
     
     @validates('export_quantity')
     def validate_export_quantity(self, key, export_quantity):
-        if export_quantity is not None:
-            assert export_quantity <= self.quantity, "La cantidad de exportación no puede ser mayor que la cantidad total"
-            assert export_quantity >= 0, "La cantidad de exportación no puede ser negativa"
-        return export_quantity
+        return check_export_quantity(export_quantity, self.quantity)
 
 
-    @property
+    @hybrid_property
     def food_required(self):
         return round(self.quantity * (self.food_per_bird or 0), 2)  # Redondeado a 2 decimales
 
+    @food_required.expression
+    def food_required(cls):
+        # Misma fórmula evaluada en SQL para poder agregarla en consultas
+        return func.round(cls.quantity * func.coalesce(cls.food_per_bird, 0), 2, type_=db.Float)
+
     @validates('quantity')
     def validate_quantity(self, key, quantity):
-        assert quantity >= 0, "Cantidad no puede ser negativa"
-        return quantity
+        return check_quantity(quantity)
 
     @validates('food_per_bird')
     def validate_food_per_bird(self, key, food_per_bird):
-        if food_per_bird is not None:
-            assert food_per_bird >= 0, "Cantidad de alimento no puede ser negativa"
-        return food_per_bird
+        return check_food_per_bird(food_per_bird)
     
 class BirdFoodType(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -122,4 +275,203 @@ class BirdFoodType(db.Model):
     @validates('price_per_pound')
     def validate_price(self, key, price):
         assert price >= 0, "El precio no puede ser negativo"
-        return price
\ No newline at end of file
+        return price
+
+class CategoryInventory(db.Model):
+    # Totales precalculados por categoría (solo usuarios asociados)
+    category_id = db.Column(db.Integer, db.ForeignKey('bird_category.id'), primary_key=True)
+    total_quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_export = db.Column(db.Integer, nullable=False, default=0)
+    total_food = db.Column(db.Float)  # lb/día; NULL en bases anteriores hasta ensure_rollups
+    category = db.relationship('BirdCategory')
+
+
+class UserInventory(db.Model):
+    # Totales precalculados por usuario
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    total_quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_export = db.Column(db.Integer, nullable=False, default=0)
+
+
+class InventoryEvent(db.Model):
+    # Historial de cambios de inventario (solo se agregan filas)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('bird_category.id'), nullable=False)
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    quantity = db.Column(db.Integer, nullable=False, default=0)  # Cantidad tras el cambio
+    quantity_delta = db.Column(db.Integer, nullable=False, default=0)
+    food_required = db.Column(db.Float, nullable=False, default=0.0)  # lb/día tras el cambio
+    food_delta = db.Column(db.Float, nullable=False, default=0.0)
+    source = db.Column(db.String(20))  # 'profile', 'specialist', 'bulk'
+
+    __table_args__ = (
+        db.Index('ix_inventory_event_user_category_ts', 'user_id', 'category_id', 'ts'),
+    )
+
+
+class InventoryDaily(db.Model):
+    # Cambios netos por usuario y día, para tendencias y comparaciones semanales
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    quantity_delta = db.Column(db.Integer, nullable=False, default=0)
+    food_delta = db.Column(db.Float, nullable=False, default=0.0)
+    events = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_inventory_daily_day', 'day'),
+    )
+
+
+class LoginAttempt(db.Model):
+    # Intentos fallidos de inicio de sesión (ventana deslizante compartida entre workers)
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(200), nullable=False)  # 'user:<usuario>' o 'ip:<dirección>'
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_login_attempt_key_ts', 'key', 'ts'),
+        db.Index('ix_login_attempt_ts', 'ts'),
+    )
+
+
+class Contest(db.Model):
+    # Diccionario de nombres de concurso con sus usos, sincronizado con Award
+    # (ver contests.py); sirve el autocompletado sin recorrer los premios
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), unique=True, nullable=False)
+    search_key = db.Column(db.String(200), nullable=False, index=True)  # minúsculas y sin tildes
+    usage_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AwardStanding(db.Model):
+    # Clasificación precalculada por ámbito: 'all' (general, clave ''), 'year'
+    # ('2024'), 'contest' (nombre del concurso) o 'category'. Se actualiza con
+    # cada premio agregado o borrado (ver standings.py)
+    scope = db.Column(db.String(10), primary_key=True)
+    key = db.Column(db.String(200), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True, index=True)
+    awards = db.Column(db.Integer, nullable=False, default=0)
+    points = db.Column(db.Integer, nullable=False, default=0)
+    grand_prizes = db.Column(db.Integer, nullable=False, default=0)
+    firsts = db.Column(db.Integer, nullable=False, default=0)
+    seconds = db.Column(db.Integer, nullable=False, default=0)
+    thirds = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_award_standing_rank', 'scope', 'key', 'points'),
+    )
+
+
+class ReportJob(db.Model):
+    # Cola de reportes pesados atendida por `flask jobs-worker` (ver jobs.py)
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)  # 'associates', 'contact', 'awards', 'birds'
+    format = db.Column(db.String(10), nullable=False)  # 'html', 'csv', 'xlsx'
+    status = db.Column(db.String(10), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    requested_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    filename = db.Column(db.String(255))  # Resultado dentro de REPORT_JOB_FOLDER
+    size = db.Column(db.Integer)
+    error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_report_job_status_id', 'status', 'id'),
+        db.Index('ix_report_job_user_created', 'requested_by', 'created_at'),
+    )
+
+
+class DataVersion(db.Model):
+    # Contador que sube con cada escritura sobre los datos de los reportes;
+    # invalida la caché de páginas y forma parte del ETag. Es una sola fila:
+    # en PostgreSQL el upsert la bloquea hasta el commit y las transacciones
+    # que escriben datos de reportes se serializan entre sí (en SQLite la base
+    # entera ya se bloquea). Suficiente para el volumen de escrituras del club;
+    # con más concurrencia habría que repartirlo en varias filas y sumarlas al leer
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Modelos cuyos cambios invalidan los reportes
+REPORT_MODELS = (User, UserBirds, Award, BirdCategory)
+
+
+def _bump_data_version(session, name='reports'):
+    connection = session.connection()
+    if connection.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    table = DataVersion.__table__
+    connection.execute(
+        insert(table).values(name=name, version=1)
+        .on_conflict_do_update(index_elements=['name'], set_={'version': table.c.version + 1})
+    )
+
+
+@event.listens_for(Session, 'before_flush')
+def _version_on_flush(session, flush_context, instances):
+    # session.dirty incluye objetos con atributos reasignados al mismo valor
+    # (p. ej. el perfil guardado sin cambios); solo cuentan los modificados
+    changed = (*session.new, *session.deleted,
+               *(obj for obj in session.dirty if session.is_modified(obj)))
+    if any(isinstance(obj, REPORT_MODELS) for obj in changed):
+        _bump_data_version(session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _version_on_bulk(orm_execute_state):
+    # INSERT/UPDATE/DELETE masivos (importación, inventario, alimentación) no pasan por el flush
+    mapper = orm_execute_state.bind_mapper
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and mapper is not None and issubclass(mapper.class_, REPORT_MODELS):
+        _bump_data_version(orm_execute_state.session)
+
+
+def data_version(name='reports'):
+    return db.session.execute(
+        db.select(DataVersion.version).where(DataVersion.name == name)
+    ).scalar() or 0
+
+
+def sync_schema(engine=None):
+    # create_all no toca tablas existentes: agregar además las columnas
+    # (opcionales o con valor por defecto) y los índices que falten
+    engine = engine or db.engine
+    db.metadata.create_all(engine)
+    existing = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            columns = {column['name'] for column in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}'))
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def configure_sqlite(engine, journal_mode, synchronous, busy_timeout):
+    # WAL permite lectores concurrentes mientras un worker escribe
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout)}')
+        if journal_mode:
+            cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        if synchronous:
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+        cursor.close()
+
+
+def upsert(model):
+    # INSERT ... ON CONFLICT según el motor (SQLite o PostgreSQL)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
@@ -0,0 +1,51 @@
+import hashlib
+from functools import wraps
+
+from flask import g, request, session, make_response
+from flask_login import current_user
+from markupsafe import Markup
+
+from cache import TTLCache
+from models import data_version
+
+# Cuerpo ya renderizado de cada reporte por versión de datos. La versión sube
+# en la misma transacción que cualquier escritura sobre usuarios, aves, premios
+# o categorías, así que una entrada nunca queda desactualizada; el TTL solo
+# libera memoria.
+fragments = TTLCache(maxsize=16, ttl=600)
+
+
+def current_version():
+    # Una sola lectura del contador por petición
+    if 'data_version' not in g:
+        g.data_version = data_version()
+    return g.data_version
+
+
+def fragment(name, render):
+    # render() solo se llama si no hay copia para la versión actual
+    key = (name, current_version())
+    return fragments.get_or_set(key, lambda: Markup(render()))
+
+
+def conditional(view):
+    # ETag por usuario (la página incluye su nombre en la barra), versión de
+    # datos y parámetros. Si el navegador ya tiene esa versión se responde 304
+    # sin consultar los datos ni renderizar la plantilla.
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = repr((request.endpoint, current_user.get_id(), current_version(), sorted(request.args.items(multi=True))))
+        etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+
+        # Con mensajes flash pendientes se renderiza para mostrarlos
+        if etag in request.if_none_match and '_flashes' not in session:
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == 'text/html':
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
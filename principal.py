@@ -0,0 +1,55 @@
+from sqlalchemy import select
+
+from cache import TTLCache
+from models import db, User
+
+# Usuario de la sesión cacheado por worker: las comprobaciones de rol de cada
+# ruta no consultan la base. El TTL corto acota cuánto tarda otro worker en ver
+# un cambio de rol; en el worker que hace el cambio se invalida al momento.
+principals = TTLCache(maxsize=1024, ttl=30)
+
+
+class Principal:
+    # Datos mínimos del usuario autenticado (compatibles con Flask-Login)
+    __slots__ = ('id', 'username', 'full_name', 'role', 'is_associated', 'is_active')
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, username, full_name, role, is_associated, is_active):
+        self.id = id
+        self.username = username
+        self.full_name = full_name
+        self.role = role
+        self.is_associated = is_associated
+        self.is_active = is_active is not False
+
+    def get_id(self):
+        return str(self.id)
+
+    def record(self):
+        # Objeto del ORM para escrituras y relaciones (birds, awards)
+        return db.session.get(User, self.id)
+
+
+def _load(user_id):
+    row = db.session.execute(
+        select(User.id, User.username, User.full_name, User.role, User.is_associated, User.is_active)
+        .where(User.id == user_id)
+    ).first()
+    return Principal(*row) if row else None
+
+
+def from_user(user):
+    # Tras el login se cachea directamente desde el usuario ya cargado
+    current = Principal(user.id, user.username, user.full_name, user.role, user.is_associated, user.is_active)
+    principals.set(user.id, current)
+    return current
+
+
+def load(user_id):
+    return principals.get_or_set(user_id, lambda: _load(user_id))
+
+
+def invalidate(user_id):
+    principals.invalidate(user_id)
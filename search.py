@@ -0,0 +1,93 @@
+import re
+
+from sqlalchemy import text, select, func, literal_column, table
+from models import db, User, Award
+
+# Índice de texto completo (SQLite FTS5) sobre nombre, usuario y email.
+# La tabla virtual usa la tabla user como contenido y se mantiene con triggers.
+USER_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS user_fts USING fts5(
+        full_name, username, email,
+        content='user', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS user_fts_ai AFTER INSERT ON user BEGIN
+        INSERT INTO user_fts(rowid, full_name, username, email)
+        VALUES (new.id, new.full_name, new.username, new.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS user_fts_ad AFTER DELETE ON user BEGIN
+        INSERT INTO user_fts(user_fts, rowid, full_name, username, email)
+        VALUES ('delete', old.id, old.full_name, old.username, old.email);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF full_name, username, email ON user BEGIN
+        INSERT INTO user_fts(user_fts, rowid, full_name, username, email)
+        VALUES ('delete', old.id, old.full_name, old.username, old.email);
+        INSERT INTO user_fts(rowid, full_name, username, email)
+        VALUES (new.id, new.full_name, new.username, new.email);
+    END""",
+]
+
+user_fts = table('user_fts')
+_fts_enabled = None
+
+# Por debajo de este número de premios coincidentes se materializa la lista
+SPARSE_AWARD_MATCHES = 5000
+
+
+def ensure_user_fts():
+    global _fts_enabled
+    if db.engine.dialect.name != 'sqlite':
+        return
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'user_fts'")
+    ).first()
+    try:
+        for statement in USER_FTS_DDL:
+            db.session.execute(text(statement))
+        if not exists:
+            # Indexar los usuarios que ya existían
+            db.session.execute(text("INSERT INTO user_fts(user_fts) VALUES ('rebuild')"))
+        db.session.commit()
+        _fts_enabled = True
+    except Exception:
+        # SQLite compilado sin FTS5: se usa la búsqueda con LIKE
+        db.session.rollback()
+
+
+def fts_enabled():
+    # Se comprueba una vez por proceso si `flask init-db` creó el índice
+    global _fts_enabled
+    if _fts_enabled is None:
+        _fts_enabled = db.engine.dialect.name == 'sqlite' and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'user_fts'")
+        ).first() is not None
+    return _fts_enabled
+
+
+def match_query(search):
+    # Cada palabra se busca como prefijo y todas deben aparecer
+    words = re.findall(r'\w+', search)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def user_search_filter(search):
+    if fts_enabled():
+        query = match_query(search)
+        if query:
+            return User.id.in_(
+                select(literal_column('rowid'))
+                .select_from(user_fts)
+                .where(text('user_fts MATCH :fts_query').bindparams(fts_query=query))
+            )
+    return User.full_name.ilike(f'%{search}%')
+
+
+def award_filter(*criteria):
+    # Pocos premios coincidentes: lista IN (...) leída del índice compuesto.
+    # Muchos: EXISTS correlacionado por usuario, que con el cursor sobre
+    # User.id se detiene al completar la página.
+    matches = select(Award.id).where(*criteria).limit(SPARSE_AWARD_MATCHES).subquery()
+    count = db.session.execute(select(func.count()).select_from(matches)).scalar()
+    if count < SPARSE_AWARD_MATCHES:
+        return User.id.in_(select(Award.user_id).where(*criteria))
+    return select(Award.id).where(Award.user_id == User.id, *criteria).exists()
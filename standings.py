@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+from sqlalchemy import select, update, delete, func, case, extract, literal, union_all, String
+from models import db, User, Award, AwardStanding, upsert, position_rank
+
+SCOPES = {'all': 'General', 'year': 'Año', 'contest': 'Concurso', 'category': 'Categoría'}
+COUNTERS = ('awards', 'points', 'grand_prizes', 'firsts', 'seconds', 'thirds')
+
+# Puntos por puesto normalizado (0 = Gran Premio); menciones y otros suman OTHER_POINTS
+POINTS = {0: 10, 1: 7, 2: 5, 3: 3, 4: 2}
+OTHER_POINTS = 1
+PODIUM = {0: 'grand_prizes', 1: 'firsts', 2: 'seconds', 3: 'thirds'}
+MAX_LIMIT = 100
+
+
+def _scope_keys(award_date, contest_name, category):
+    yield 'all', ''
+    yield 'year', str(award_date.year)
+    yield 'contest', contest_name
+    if category:
+        yield 'category', category
+
+
+def apply(awards, sign=1):
+    # Suma (sign=1) o resta (sign=-1) premios en las clasificaciones. awards
+    # puede ser objetos Award o diccionarios como los de la importación
+    rows = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for award in awards:
+        get = award.get if isinstance(award, dict) else lambda name: getattr(award, name)
+        rank = get('position_rank')
+        for scope, key in _scope_keys(get('award_date'), get('contest_name'), get('category')):
+            row = rows[(scope, key, get('user_id'))]
+            row['awards'] += sign
+            row['points'] += sign * POINTS.get(rank, OTHER_POINTS)
+            if rank in PODIUM:
+                row[PODIUM[rank]] += sign
+    if not rows:
+        return
+
+    stmt = upsert(AwardStanding)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['scope', 'key', 'user_id'],
+        set_={name: getattr(AwardStanding, name) + getattr(stmt.excluded, name) for name in COUNTERS}
+    )
+    db.session.execute(stmt, [
+        {'scope': scope, 'key': key, 'user_id': user_id, **counters}
+        for (scope, key, user_id), counters in rows.items()
+    ])
+    if sign < 0:
+        db.session.execute(
+            delete(AwardStanding)
+            .where(AwardStanding.user_id.in_({user_id for _, _, user_id in rows}),
+                   AwardStanding.awards <= 0)
+        )
+
+
+def remove_user(user_id):
+    db.session.execute(delete(AwardStanding).where(AwardStanding.user_id == user_id))
+
+
+def rebuild():
+    # Recalcula todas las clasificaciones desde Award con una consulta por ámbito
+    db.session.execute(delete(AwardStanding))
+    counters = [
+        func.count(Award.id),
+        func.sum(case(POINTS, value=Award.position_rank, else_=OTHER_POINTS)),
+        *[func.sum(case((Award.position_rank == rank, 1), else_=0)) for rank in PODIUM]
+    ]
+    year = func.cast(extract('year', Award.award_date), String)
+    selects = [
+        select(literal('all'), literal(''), Award.user_id, *counters).group_by(Award.user_id),
+        select(literal('year'), year, Award.user_id, *counters).group_by(year, Award.user_id),
+        select(literal('contest'), Award.contest_name, Award.user_id, *counters)
+        .group_by(Award.contest_name, Award.user_id),
+        select(literal('category'), Award.category, Award.user_id, *counters)
+        .where(Award.category.is_not(None), Award.category != '')
+        .group_by(Award.category, Award.user_id),
+    ]
+    db.session.execute(
+        AwardStanding.__table__.insert().from_select(
+            ['scope', 'key', 'user_id', *COUNTERS], union_all(*selects)
+        )
+    )
+
+
+def ensure_standings():
+    # Bases anteriores: normaliza los puestos y calcula las clasificaciones
+    positions = db.session.execute(
+        select(Award.position).distinct()
+        .where(Award.position.is_not(None), Award.position_rank.is_(None))
+    ).scalars().all()
+    ranked = {position: position_rank(position) for position in positions}
+    ranked = {position: rank for position, rank in ranked.items() if rank is not None}
+    for position, rank in ranked.items():
+        db.session.execute(update(Award).where(Award.position == position).values(position_rank=rank))
+    empty = db.session.execute(select(AwardStanding.user_id).limit(1)).first() is None
+    if ranked or (empty and db.session.execute(select(Award.id).limit(1)).first() is not None):
+        rebuild()
+    db.session.commit()
+
+
+def leaderboard(scope='all', key='', limit=10):
+    # Los primeros `limit` del ámbito, recorriendo el índice (scope, key, points)
+    return db.session.execute(
+        select(AwardStanding, User.full_name, User.username)
+        .join(User, User.id == AwardStanding.user_id)
+        .where(AwardStanding.scope == scope, AwardStanding.key == key)
+        .order_by(AwardStanding.points.desc(), AwardStanding.grand_prizes.desc(),
+                  AwardStanding.firsts.desc(), AwardStanding.seconds.desc(),
+                  AwardStanding.thirds.desc(), AwardStanding.awards.desc(), User.full_name)
+        .limit(max(min(limit, MAX_LIMIT), 1))
+    ).all()
+
+
+def scope_keys(scope):
+    order = AwardStanding.key.desc() if scope == 'year' else AwardStanding.key
+    return db.session.execute(
+        select(AwardStanding.key).distinct().where(AwardStanding.scope == scope).order_by(order)
+    ).scalars().all()
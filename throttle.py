@@ -0,0 +1,115 @@
+import math
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import select, delete, func
+
+from models import db, LoginAttempt
+
+
+class MemoryLimiter:
+    # Ventana deslizante en memoria: cada worker lleva su propio conteo
+    def __init__(self, window, maxkeys=10000):
+        self.window = window
+        self.maxkeys = maxkeys
+        self._attempts = OrderedDict()
+        self._lock = Lock()
+
+    def retry_after(self, limits):
+        now = time.monotonic()
+        wait = 0
+        with self._lock:
+            for key, limit in limits.items():
+                attempts = self._attempts.get(key)
+                if not attempts:
+                    continue
+                while attempts and attempts[0] <= now - self.window:
+                    attempts.popleft()
+                if len(attempts) >= limit:
+                    wait = max(wait, attempts[-limit] + self.window - now)
+        return math.ceil(wait)
+
+    def hit(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                self._attempts.setdefault(key, deque()).append(now)
+                self._attempts.move_to_end(key)
+            while len(self._attempts) > self.maxkeys:
+                self._attempts.popitem(last=False)
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+class DatabaseLimiter:
+    # Ventana deslizante en la tabla login_attempt: todos los workers comparten
+    # el conteo
+    def __init__(self, window):
+        self.window = window
+
+    def retry_after(self, limits):
+        now = datetime.utcnow()
+        rows = db.session.execute(
+            select(LoginAttempt.key, func.count(), func.min(LoginAttempt.ts))
+            .where(LoginAttempt.key.in_(limits), LoginAttempt.ts > now - timedelta(seconds=self.window))
+            .group_by(LoginAttempt.key)
+        ).all()
+        # Los intentos bloqueados no se registran, así que el conteo no supera
+        # el límite y el más antiguo marca cuándo se libera la ventana
+        wait = max([(oldest + timedelta(seconds=self.window) - now).total_seconds()
+                    for key, count, oldest in rows if count >= limits[key]], default=0)
+        return math.ceil(wait)
+
+    def hit(self, keys):
+        # Se barren los vencidos de todas las claves, no solo de estas: los
+        # usuarios o IPs de un solo intento (credential stuffing) no vuelven
+        # y sus filas quedarían para siempre. Rango sobre ix_login_attempt_ts
+        cutoff = datetime.utcnow() - timedelta(seconds=self.window)
+        db.session.execute(delete(LoginAttempt).where(LoginAttempt.ts <= cutoff))
+        db.session.add_all(LoginAttempt(key=key) for key in keys)
+        db.session.commit()
+
+    def reset(self, key):
+        db.session.execute(delete(LoginAttempt).where(LoginAttempt.key == key))
+        db.session.commit()
+
+
+def limiter():
+    storage = current_app.config['LOGIN_THROTTLE_STORAGE']
+    if not storage:
+        return None
+    if 'login_throttle' not in current_app.extensions:
+        window = current_app.config['LOGIN_THROTTLE_WINDOW']
+        current_app.extensions['login_throttle'] = \
+            DatabaseLimiter(window) if storage == 'database' else MemoryLimiter(window)
+    return current_app.extensions['login_throttle']
+
+
+def _limits(username, ip):
+    return {
+        f'user:{username.strip().lower()}': current_app.config['LOGIN_THROTTLE_USER_LIMIT'],
+        f'ip:{ip}': current_app.config['LOGIN_THROTTLE_IP_LIMIT']
+    }
+
+
+def retry_after(username, ip):
+    # Segundos hasta poder volver a intentarlo (0 = permitido)
+    backend = limiter()
+    return backend.retry_after(_limits(username, ip)) if backend else 0
+
+
+def record_failure(username, ip):
+    backend = limiter()
+    if backend:
+        backend.hit(list(_limits(username, ip)))
+
+
+def reset(username):
+    backend = limiter()
+    if backend:
+        backend.reset(f'user:{username.strip().lower()}')
@@ -0,0 +1,6 @@
+# Punto de entrada WSGI para producción:
+#   APP_ENV=production SECRET_KEY=... gunicorn -c gunicorn.conf.py wsgi:app
+# Antes del primer arranque (y tras cada actualización): flask init-db && flask seed
+from app import create_app
+
+app = application = create_app()